@@ -9,13 +9,13 @@ KUKA 文件动画播放器
 import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from matplotlib.widgets import Button, Slider
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 from kuka_src_parser import KUKASrcParser
-import copy
 import os
-import glob
+import fnmatch
+from itertools import chain
 
 # Try to import tkinter for file dialogs (cross-platform)
 try:
@@ -25,6 +25,20 @@ try:
 except ImportError:
     HAS_TKINTER = False
 
+# Try to import numba for JIT-compiled rotation math (optional)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Try to import scipy for batched rotation matrices (optional)
+try:
+    from scipy.spatial.transform import Rotation
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
 
 def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.NC"]):
     """Simple text-based file picker when GUI not available"""
@@ -32,18 +46,17 @@ def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.N
     print(f"{title}")
     print(f"{'=' * 60}")
 
-    # 收集所有匹配的文件
-    all_files = []
-    for pattern in file_patterns:
-        all_files.extend(glob.glob(pattern))
-
-    # 去重并排序
-    all_files = sorted(set(all_files))
+    # 扫描当前目录一次收集所有匹配的文件，文件大小取自目录项缓存的stat
+    with os.scandir('.') as it:
+        entries = sorted((e.name, e.stat().st_size) for e in it
+                         if not e.name.startswith('.') and e.is_file()
+                         and any(fnmatch.fnmatch(e.name, p) for p in file_patterns))
+    all_files = [name for name, _ in entries]
 
     if all_files:
         print(f"\nAvailable files (.src, .nc, .NC):")
-        for i, f in enumerate(all_files, 1):
-            size = os.path.getsize(f) / 1024  # KB
+        for i, (f, size) in enumerate(entries, 1):
+            size = size / 1024  # KB
             file_type = f.split('.')[-1].upper()
             print(f"  [{i}] {f:<30} ({size:.1f} KB) [{file_type}]")
 
@@ -73,12 +86,101 @@ def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.N
             return None
 
 
+# 工具坐标系箭头长度 (mm)
+TOOL_AXIS_LENGTH = 30
+
+# 超长程序的路径抽稀显示（LOD）：完整路径最多显示约这么多点
+FULL_PATH_MAX_POINTS = 5000
+# 点数超过此值时，已走过路径也按相同间隔抽稀显示
+TRAVELED_LOD_THRESHOLD = 20000
+
+# 信息显示模板 (英文)，只解析一次，逐帧用 str.format 填充
+INFO_TEMPLATE = """Progress: {frame}/{total} ({progress:.1f}%)
+Motion: {cmd_type}
+Velocity: {vel:.0f} mm/s
+Position (TCP):
+  X: {pos[0]:8.2f} mm
+  Y: {pos[1]:8.2f} mm
+  Z: {pos[2]:8.2f} mm
+Orientation:
+  A: {ori[0]:8.2f}°
+  B: {ori[1]:8.2f}°
+  C: {ori[2]:8.2f}°
+Breakpoint: {bp}"""
+
+
+def rotation_matrices_from_euler_zyx(angles):
+    """批量计算欧拉角ZYX（KUKA的ABC）对应的旋转矩阵
+
+    angles: (N, 3) 角度数组 [A, B, C]，单位为度
+    返回: (N, 3, 3) 旋转矩阵数组，R = Rz(A) @ Ry(B) @ Rx(C)
+    """
+    angles = np.asarray(angles).reshape(-1, 3)
+    if angles.dtype.kind != 'f':
+        angles = angles.astype(float)
+
+    # 有scipy时直接用其C实现（大写'ZYX'为内旋顺序，与KUKA一致）
+    if HAS_SCIPY and len(angles) > 0:
+        return Rotation.from_euler('ZYX', angles, degrees=True).as_matrix()
+
+    a, b, c = np.radians(angles).T
+    sa, ca = np.sin(a), np.cos(a)
+    sb, cb = np.sin(b), np.cos(b)
+    sc, cc = np.sin(c), np.cos(c)
+
+    # 展开 Rz @ Ry @ Rx 的9个元素
+    R = np.empty((len(a), 3, 3), dtype=angles.dtype)
+    R[:, 0, 0] = ca * cb
+    R[:, 0, 1] = ca * sb * sc - sa * cc
+    R[:, 0, 2] = ca * sb * cc + sa * sc
+    R[:, 1, 0] = sa * cb
+    R[:, 1, 1] = sa * sb * sc + ca * cc
+    R[:, 1, 2] = sa * sb * cc - ca * sc
+    R[:, 2, 0] = -sb
+    R[:, 2, 1] = cb * sc
+    R[:, 2, 2] = cb * cc
+    return R
+
+
+# 角度转弧度系数 (pi / 180)
+DEG2RAD = 0.017453292519943295
+
+
+def _rot_zyx(a, b, c):
+    """单个欧拉角ZYX旋转矩阵（展开 Rz @ Ry @ Rx 的9个元素，不产生临时矩阵）
+
+    KUKA使用ZYX顺序: 先绕Z轴转A，再绕Y'轴转B，最后绕X''轴转C
+    """
+    a, b, c = a * DEG2RAD, b * DEG2RAD, c * DEG2RAD
+    sa, ca = np.sin(a), np.cos(a)
+    sb, cb = np.sin(b), np.cos(b)
+    sc, cc = np.sin(c), np.cos(c)
+
+    R = np.empty((3, 3))
+    R[0, 0] = ca * cb
+    R[0, 1] = ca * sb * sc - sa * cc
+    R[0, 2] = ca * sb * cc + sa * sc
+    R[1, 0] = sa * cb
+    R[1, 1] = sa * sb * sc + ca * cc
+    R[1, 2] = sa * sb * cc - ca * sc
+    R[2, 0] = -sb
+    R[2, 1] = cb * sc
+    R[2, 2] = cb * cc
+    return R
+
+
+if HAS_NUMBA:
+    # 有numba时编译同一函数。首次调用时需要JIT编译（约数百毫秒），
+    # cache=True 将编译结果缓存到磁盘，之后启动直接加载，不再重复编译
+    _rot_zyx = njit(cache=True, fastmath=True)(_rot_zyx)
+
+
 class KUKAAnimator:
     """KUKA路径动画播放器"""
 
     def __init__(self, parser: KUKASrcParser = None):
         self.parser = parser
-        self.original_parser = copy.deepcopy(parser) if parser else None
+        self.original_parser = parser  # 播放器只读不改，无需深拷贝
 
         # 动画状态
         self.current_frame = 0
@@ -90,10 +192,16 @@ class KUKAAnimator:
         # 初始化数据
         self.points = np.array([])
         self.orientations = np.array([])
+        self.rotation_matrices = np.empty((0, 3, 3))
+        self.tool_endpoints = np.empty((0, 3, 3))
+        self.tool_segments = np.empty((0, 3, 2, 3))
         self.velocities = []
         self.command_types = []
         self.total_points = 0
 
+        self._tk_root = None  # 文件对话框使用的tkinter root
+        self._plots_ready = False  # 常驻绘图对象是否已创建
+
         # 提取数据
         if parser:
             self.extract_data()
@@ -103,22 +211,37 @@ class KUKAAnimator:
 
     def extract_data(self):
         """从parser中提取所有笛卡尔坐标点和姿态"""
-        self.points = []
-        self.orientations = []  # 存储姿态角度 (A, B, C)
-        self.velocities = []
-        self.command_types = []
+        motions = [cmd for cmd in self.parser.motion_commands if cmd.position] if self.parser else []
+
+        # 一次性收集为 (N, 7) 数组：X Y Z A B C 速度，points/orientations/velocities 均为其切片视图
+        # 仅用于显示，float32 精度足够（毫米级路径误差远小于0.01mm），内存减半
+        # fromiter按已知长度直接填充，不生成中间的元组列表
+        values = chain.from_iterable((cmd.position.x, cmd.position.y, cmd.position.z,
+                                      cmd.position.a, cmd.position.b, cmd.position.c,
+                                      cmd.velocity if cmd.velocity else 0.0)
+                                     for cmd in motions)
+        data = np.fromiter(values, dtype=np.float32, count=7 * len(motions)).reshape(-1, 7)
+
+        self.points = data[:, 0:3]
+        self.orientations = data[:, 3:6]  # 存储姿态角度 (A, B, C)
+        self.velocities = data[:, 6]
+        self.command_types = [cmd.command_type for cmd in motions]
+        self.total_points = len(self.points)
 
-        if self.parser:
-            for cmd in self.parser.motion_commands:
-                if cmd.position:
-                    self.points.append([cmd.position.x, cmd.position.y, cmd.position.z])
-                    self.orientations.append([cmd.position.a, cmd.position.b, cmd.position.c])
-                    self.velocities.append(cmd.velocity if cmd.velocity else 0)
-                    self.command_types.append(cmd.command_type)
+        # 姿态加载后不再变化，一次性预计算所有旋转矩阵
+        self.rotation_matrices = rotation_matrices_from_euler_zyx(self.orientations).astype(np.float32, copy=False)
 
-        self.points = np.array(self.points) if self.points else np.array([])
-        self.orientations = np.array(self.orientations) if self.orientations else np.array([])
-        self.total_points = len(self.points)
+        # 旋转矩阵第j列即工具坐标系第j轴方向，转置后 tool_endpoints[i, j] 为第i帧第j轴箭头终点
+        self.tool_endpoints = self.points[:, None, :] + \
+            np.transpose(self.rotation_matrices, (0, 2, 1)) * TOOL_AXIS_LENGTH
+
+        # 工具坐标系线段 (N, 3, 2, 3)：每帧3条线段，起点为TCP，终点为箭头终点
+        self.tool_segments = np.empty((self.total_points, 3, 2, 3), dtype=np.float32)
+        self.tool_segments[:, :, 0, :] = self.points[:, None, :]
+        self.tool_segments[:, :, 1, :] = self.tool_endpoints
+
+        # 按坐标分量转置存放的路径 (3, N)，每行连续，逐帧切片即为视图无需复制
+        self.path_xyz = np.ascontiguousarray(self.points.reshape(-1, 3).T)
 
     def create_animation(self):
         """创建动画界面"""
@@ -139,18 +262,39 @@ class KUKAAnimator:
         # 控制面板
         self.create_controls()
 
-        # 创建动画
-        self.anim = FuncAnimation(
-            self.fig,
-            self.update_animation,
-            interval=50,  # 50ms = 20fps，通过speed调整
-            repeat=False,  # 不自动重复，到终点停止
-            blit=False,
-            cache_frame_data=False  # 不缓存帧数据
-        )
+        # 动画对象（blit模式：每帧只重绘这些对象，背景使用缓存）
+        self._background = None
+        self._init_anim_artists()
+
+        # 播放计时器：只在播放时运行，暂停时不占用CPU
+        self.timer = self.fig.canvas.new_timer(interval=50)  # 50ms = 20fps，通过speed调整
+        self.timer.add_callback(self._tick)
+
+        # 完整重绘后缓存背景并补画动画对象
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+        # 关闭窗口时销毁文件对话框的tkinter root
+        self.fig.canvas.mpl_connect('close_event', self._on_close)
+
+        # 键盘: 1/2 切换侧视图/俯视图的显示
+        self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+
+        # 合并重绘请求：拖动进度条等高频操作在一个周期内最多重绘一次
+        self._redraw_pending = False
+        self._redraw_timer = self.fig.canvas.new_timer(interval=33)
+        self._redraw_timer.single_shot = True
+        self._redraw_timer.add_callback(self._flush_redraw)
 
     def init_plots(self):
         """初始化所有视图"""
+        self._path_len = 0  # 已走过路径当前显示的点数
+        self._info_key = None  # 信息文本当前对应的 (帧, 断点)
+
+        # 当前点坐标的复用缓冲区（各视图共用，逐帧原地写入）
+        self._cp_x = np.empty(1)
+        self._cp_y = np.empty(1)
+        self._cp_z = np.empty(1)
+
         if self.total_points == 0:
             # Show message when no file is loaded
             self.ax_3d.text2D(0.5, 0.5, 'No file loaded\n\nClick "Open" to load a file',
@@ -178,61 +322,51 @@ class KUKAAnimator:
             self.ax_xy.set_title('Top View (XY)')
             return
 
+        # 绘图对象只创建一次，之后加载新文件时只更新数据
+        if not self._plots_ready:
+            self.create_plot_artists()
+            self._plots_ready = True
+
+        self.update_plot_data()
+
+    def create_plot_artists(self):
+        """创建所有常驻绘图对象（数据由 update_plot_data 填充）"""
+        # 清除 "No file loaded" 提示
+        self.ax_3d.clear()
+        self.ax_xz.clear()
+        self.ax_xy.clear()
+
         # 3D视图 - 显示完整路径（半透明）
-        self.ax_3d.plot(self.points[:, 0], self.points[:, 1], self.points[:, 2],
-                       'gray', linewidth=0.5, alpha=0.2, label='Full Path')  # 完整路径
+        self.full_path_3d, = self.ax_3d.plot([], [], [], 'gray', linewidth=0.5, alpha=0.2,
+                                             label='Full Path')  # 完整路径
 
         # 当前点
         self.current_point_3d, = self.ax_3d.plot([], [], [], 'ro',
                                                   markersize=10, label='TCP')  # TCP: Tool Center Point
 
-        # 工具坐标系箭头（X-红, Y-绿, Z-蓝）
-        self.tool_x_arrow = self.ax_3d.quiver([], [], [], [], [], [],
-                                               color='red', arrow_length_ratio=0.3, linewidth=2, label='Tool X')
-        self.tool_y_arrow = self.ax_3d.quiver([], [], [], [], [], [],
-                                               color='green', arrow_length_ratio=0.3, linewidth=2, label='Tool Y')
-        self.tool_z_arrow = self.ax_3d.quiver([], [], [], [], [], [],
-                                               color='blue', arrow_length_ratio=0.3, linewidth=2, label='Tool Z')
+        # 工具坐标系（X-红, Y-绿, Z-蓝）：一个常驻的线段集合，每帧只更新线段端点
+        self.tool_axes_lc = Line3DCollection(np.zeros((3, 2, 3)),
+                                             colors=['red', 'green', 'blue'],
+                                             linewidths=2.5, alpha=0.9)
+        self.ax_3d.add_collection3d(self.tool_axes_lc)
+        # 图例用的空线条
+        self.ax_3d.plot([], [], [], color='red', linewidth=2, label='Tool X')
+        self.ax_3d.plot([], [], [], color='green', linewidth=2, label='Tool Y')
+        self.ax_3d.plot([], [], [], color='blue', linewidth=2, label='Tool Z')
 
         # 已走过的路径
         self.path_traveled_3d, = self.ax_3d.plot([], [], [], 'b-',
                                                   linewidth=2, alpha=0.8, label='Traveled')  # 已完成
 
-        # 起点和终点
-        self.ax_3d.scatter(self.points[0, 0], self.points[0, 1], self.points[0, 2],
-                          c='lime', s=200, marker='o', label='Start', edgecolors='black', linewidths=2)  # 起点
-        self.ax_3d.scatter(self.points[-1, 0], self.points[-1, 1], self.points[-1, 2],
-                          c='red', s=200, marker='X', label='End', edgecolors='black', linewidths=2)  # 终点
-
         self.ax_3d.set_xlabel('X (mm)', fontweight='bold')
         self.ax_3d.set_ylabel('Y (mm)', fontweight='bold')
         self.ax_3d.set_zlabel('Z (mm)', fontweight='bold')
-        self.ax_3d.set_title(f'{self.parser.program_name} - 3D Animation', fontweight='bold')  # 3D动画播放
-        self.ax_3d.legend(loc='upper right')
         self.ax_3d.grid(True, alpha=0.3)
 
-        # 设置相同比例
-        max_range = np.array([
-            self.points[:, 0].max() - self.points[:, 0].min(),
-            self.points[:, 1].max() - self.points[:, 1].min(),
-            self.points[:, 2].max() - self.points[:, 2].min()
-        ]).max() / 2.0
-
-        mid_x = (self.points[:, 0].max() + self.points[:, 0].min()) * 0.5
-        mid_y = (self.points[:, 1].max() + self.points[:, 1].min()) * 0.5
-        mid_z = (self.points[:, 2].max() + self.points[:, 2].min()) * 0.5
-
-        self.ax_3d.set_xlim(mid_x - max_range, mid_x + max_range)
-        self.ax_3d.set_ylim(mid_y - max_range, mid_y + max_range)
-        self.ax_3d.set_zlim(mid_z - max_range, mid_z + max_range)
-
         # XZ侧视图
-        self.ax_xz.plot(self.points[:, 0], self.points[:, 2], 'gray',
-                       linewidth=0.5, alpha=0.2)
+        self.full_path_xz, = self.ax_xz.plot([], [], 'gray', linewidth=0.5, alpha=0.2)
         self.current_point_xz, = self.ax_xz.plot([], [], 'ro', markersize=10)
         self.path_traveled_xz, = self.ax_xz.plot([], [], 'b-', linewidth=2)
-        self.ax_xz.scatter(self.points[0, 0], self.points[0, 2], c='lime', s=100, marker='o')
-        self.ax_xz.scatter(self.points[-1, 0], self.points[-1, 2], c='red', s=100, marker='X')
         self.ax_xz.set_xlabel('X (mm)')
         self.ax_xz.set_ylabel('Z (mm)')
         self.ax_xz.set_title('Side View (XZ)')  # 侧视图
@@ -240,18 +374,77 @@ class KUKAAnimator:
         self.ax_xz.axis('equal')
 
         # XY俯视图
-        self.ax_xy.plot(self.points[:, 0], self.points[:, 1], 'gray',
-                       linewidth=0.5, alpha=0.2)
+        self.full_path_xy, = self.ax_xy.plot([], [], 'gray', linewidth=0.5, alpha=0.2)
         self.current_point_xy, = self.ax_xy.plot([], [], 'ro', markersize=10)
         self.path_traveled_xy, = self.ax_xy.plot([], [], 'b-', linewidth=2)
-        self.ax_xy.scatter(self.points[0, 0], self.points[0, 1], c='lime', s=100, marker='o')
-        self.ax_xy.scatter(self.points[-1, 0], self.points[-1, 1], c='red', s=100, marker='X')
         self.ax_xy.set_xlabel('X (mm)')
         self.ax_xy.set_ylabel('Y (mm)')
         self.ax_xy.set_title('Top View (XY)')  # 俯视图
         self.ax_xy.grid(True, alpha=0.3)
         self.ax_xy.axis('equal')
 
+        self.endpoint_markers = []
+
+    def update_plot_data(self):
+        """将当前文件的数据填入已有绘图对象，并更新坐标范围"""
+        # 完整路径（超长程序抽稀显示，仅影响绘图，不影响数据）
+        stride = max(1, self.total_points // FULL_PATH_MAX_POINTS)
+        self.traveled_stride = stride if self.total_points > TRAVELED_LOD_THRESHOLD else 1
+        xs, ys, zs = self.decimated_path(self.total_points, stride)
+
+        self.full_path_3d.set_data_3d(xs, ys, zs)
+        self.full_path_xz.set_data(xs, zs)
+        self.full_path_xy.set_data(xs, ys)
+
+        # 清空上一个文件的已走路径和当前点
+        for line in (self.path_traveled_3d, self.current_point_3d):
+            line.set_data_3d([], [], [])
+        for line in (self.path_traveled_xz, self.current_point_xz,
+                     self.path_traveled_xy, self.current_point_xy):
+            line.set_data([], [])
+
+        # 起点和终点（每个文件只有6个标记，直接替换）
+        for marker in self.endpoint_markers:
+            marker.remove()
+        start, end = self.points[0], self.points[-1]
+        self.endpoint_markers = [
+            self.ax_3d.scatter(start[0], start[1], start[2], c='lime', s=200, marker='o', label='Start',
+                               edgecolors='black', linewidths=2),  # 起点
+            self.ax_3d.scatter(end[0], end[1], end[2], c='red', s=200, marker='X', label='End',
+                               edgecolors='black', linewidths=2),  # 终点
+            self.ax_xz.scatter(start[0], start[2], c='lime', s=100, marker='o'),
+            self.ax_xz.scatter(end[0], end[2], c='red', s=100, marker='X'),
+            self.ax_xy.scatter(start[0], start[1], c='lime', s=100, marker='o'),
+            self.ax_xy.scatter(end[0], end[1], c='red', s=100, marker='X'),
+        ]
+
+        self.ax_3d.set_title(f'{self.parser.program_name} - 3D Animation', fontweight='bold')  # 3D动画播放
+        self.ax_3d.legend(loc='upper right')
+
+        # 设置相同比例
+        lo = self.points.min(axis=0)
+        hi = self.points.max(axis=0)
+        mid = (lo + hi) * 0.5
+        max_range = (hi - lo).max() / 2.0
+
+        self.ax_3d.set_xlim(mid[0] - max_range, mid[0] + max_range)
+        self.ax_3d.set_ylim(mid[1] - max_range, mid[1] + max_range)
+        self.ax_3d.set_zlim(mid[2] - max_range, mid[2] + max_range)
+
+        # 2D视图按新路径重新自动缩放
+        for ax in (self.ax_xz, self.ax_xy):
+            ax.relim()
+            ax.autoscale_view()
+
+    def decimated_path(self, n, stride):
+        """取路径前n个点，按stride间隔抽稀（保留第n个点作为终点），返回 (3, k) 数组"""
+        if stride == 1:
+            return self.path_xyz[:, :n]
+        path = self.path_xyz[:, :n:stride]
+        if (n - 1) % stride:
+            path = np.concatenate((path, self.path_xyz[:, n - 1:n]), axis=1)
+        return path
+
     def create_controls(self):
         """创建控制面板"""
         # 打开文件按钮
@@ -306,40 +499,104 @@ class KUKAAnimator:
         self.btn_clear_bp = Button(ax_clear_bp, 'Clear BP', color='lightgray')  # 清除断点
         self.btn_clear_bp.on_clicked(self.clear_breakpoint)
 
-        # 信息文本
-        self.info_text = self.fig.text(0.55, 0.17, '', fontsize=10,
-                                       family='monospace')
+        # 信息文本（放在独立的无坐标轴区域中，blit时只重绘这一块）
+        ax_info = self.fig.add_axes([0.55, 0.17, 0.25, 0.25])
+        ax_info.axis('off')
+        ax_info.set_navigate(False)
+        self.info_text = ax_info.text(0, 0, '', fontsize=10, family='monospace',
+                                      transform=ax_info.transAxes)
+
+    def _init_anim_artists(self):
+        """收集所有动画对象并标记为animated（blit模式下每帧只重绘这些对象）"""
+        if self.total_points == 0 or not self._plots_ready:
+            self.anim_artists = (self.info_text,)
+        else:
+            # 隐藏的2D视图不参与blit
+            self.anim_artists = tuple(
+                artist for artist in (self.current_point_3d, self.path_traveled_3d, self.tool_axes_lc,
+                                      self.current_point_xz, self.path_traveled_xz,
+                                      self.current_point_xy, self.path_traveled_xy,
+                                      self.info_text)
+                if artist.axes.get_visible())
+        # 进度条的填充条、滑块和数值文本每帧随进度变化，也参与blit
+        # （_handle 是 matplotlib 的私有属性，取不到时只重绘填充条和数值）
+        slider = self.slider_progress
+        handle = getattr(slider, '_handle', None)
+        self.anim_artists += tuple(artist for artist in (slider.poly, handle, slider.valtext)
+                                   if artist is not None)
+
+        for artist in self.anim_artists:
+            artist.set_animated(True)
+        return self.anim_artists
+
+    def _on_draw(self, event):
+        """完整重绘后缓存背景（不含动画对象），再补画动画对象"""
+        canvas = self.fig.canvas
+        # savefig时动画对象已正常绘制；矢量格式的画布也没有copy_from_bbox
+        if canvas.is_saving() or not hasattr(canvas, 'copy_from_bbox'):
+            return
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_anim_artists()
+
+    def _draw_anim_artists(self):
+        """绘制所有动画对象"""
+        for artist in self.anim_artists:
+            # 3D线段集合的投影只在Axes3D完整绘制时计算，单独绘制前需自行投影
+            if hasattr(artist, 'do_3d_projection'):
+                artist.do_3d_projection()
+            self.fig.draw_artist(artist)
+
+    def blit_frame(self):
+        """恢复缓存背景，只重绘动画对象并blit到屏幕"""
+        if self._background is None:
+            # 尚未完整绘制过，没有可用背景
+            self.fig.canvas.draw_idle()
+            return
+        self.fig.canvas.restore_region(self._background)
+        self._draw_anim_artists()
+        self.fig.canvas.blit(self.fig.bbox)
+
+    def _on_close(self, event):
+        """窗口关闭时释放tkinter root"""
+        if self._tk_root is not None:
+            self._tk_root.destroy()
+            self._tk_root = None
+
+    def on_key_press(self, event):
+        """键盘快捷键：1 切换侧视图(XZ)，2 切换俯视图(XY)"""
+        views = {'1': (self.ax_xz, 'Side view (XZ)'), '2': (self.ax_xy, 'Top view (XY)')}
+        if event.key not in views:
+            return
+
+        ax, name = views[event.key]
+        ax.set_visible(not ax.get_visible())
+        print(f"👁 {name} {'shown' if ax.get_visible() else 'hidden'}")
+
+        # 重新显示时需要补齐隐藏期间跳过的路径数据
+        self._path_len = 0
+        self._init_anim_artists()
+        self.render_current_frame()
+        self.fig.canvas.draw_idle()
+
+    def request_redraw(self):
+        """标记需要重绘，由定时器统一刷新"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self._redraw_timer.start()
+
+    def _flush_redraw(self):
+        """执行挂起的重绘"""
+        if self._redraw_pending:
+            self._redraw_pending = False
+            self.fig.canvas.draw_idle()
 
     def rotation_matrix_from_euler_zyx(self, a, b, c):
-        """根据欧拉角ZYX（KUKA的ABC）计算旋转矩阵"""
-        # KUKA使用ZYX顺序: 先绕Z轴转A，再绕Y'轴转B，最后绕X''轴转C
-        a_rad = np.radians(a)
-        b_rad = np.radians(b)
-        c_rad = np.radians(c)
-
-        # Z旋转 (A)
-        Rz = np.array([
-            [np.cos(a_rad), -np.sin(a_rad), 0],
-            [np.sin(a_rad),  np.cos(a_rad), 0],
-            [0, 0, 1]
-        ])
-
-        # Y旋转 (B)
-        Ry = np.array([
-            [ np.cos(b_rad), 0, np.sin(b_rad)],
-            [0, 1, 0],
-            [-np.sin(b_rad), 0, np.cos(b_rad)]
-        ])
-
-        # X旋转 (C)
-        Rx = np.array([
-            [1, 0, 0],
-            [0, np.cos(c_rad), -np.sin(c_rad)],
-            [0, np.sin(c_rad),  np.cos(c_rad)]
-        ])
-
-        # 组合旋转: R = Rz * Ry * Rx
-        return Rz @ Ry @ Rx
+        """根据欧拉角ZYX（KUKA的ABC）计算单个旋转矩阵
+
+        播放和拖动进度条都直接查 self.rotation_matrices 预计算表，不经过此函数；
+        仅供单独计算任意姿态时使用
+        """
+        return _rot_zyx(float(a), float(b), float(c))
 
     def render_current_frame(self):
         """渲染当前帧到显示（独立于播放状态）"""
@@ -356,7 +613,7 @@ load a KUKA .src file"""
             return
 
         # 检查绘图对象是否存在
-        if not hasattr(self, 'current_point_3d'):
+        if not self._plots_ready:
             # 绘图对象未初始化，先初始化
             return
 
@@ -365,83 +622,58 @@ load a KUKA .src file"""
         current_ori = self.orientations[self.current_frame]
 
         # 3D视图
-        self.current_point_3d.set_data([current_pos[0]], [current_pos[1]])
-        self.current_point_3d.set_3d_properties([current_pos[2]])
-
-        # 更新工具坐标系箭头
-        arrow_length = 30  # 箭头长度 (mm)
-        R = self.rotation_matrix_from_euler_zyx(current_ori[0], current_ori[1], current_ori[2])
-
-        # 计算三个坐标轴方向
-        x_axis = R @ np.array([arrow_length, 0, 0])
-        y_axis = R @ np.array([0, arrow_length, 0])
-        z_axis = R @ np.array([0, 0, arrow_length])
-
-        # 移除旧箭头
-        self.tool_x_arrow.remove()
-        self.tool_y_arrow.remove()
-        self.tool_z_arrow.remove()
-
-        # 绘制新箭头
-        self.tool_x_arrow = self.ax_3d.quiver(
-            current_pos[0], current_pos[1], current_pos[2],
-            x_axis[0], x_axis[1], x_axis[2],
-            color='red', arrow_length_ratio=0.2, linewidth=2.5, alpha=0.9
-        )
-        self.tool_y_arrow = self.ax_3d.quiver(
-            current_pos[0], current_pos[1], current_pos[2],
-            y_axis[0], y_axis[1], y_axis[2],
-            color='green', arrow_length_ratio=0.2, linewidth=2.5, alpha=0.9
-        )
-        self.tool_z_arrow = self.ax_3d.quiver(
-            current_pos[0], current_pos[1], current_pos[2],
-            z_axis[0], z_axis[1], z_axis[2],
-            color='blue', arrow_length_ratio=0.2, linewidth=2.5, alpha=0.9
-        )
-
-        # 已走过的路径
-        traveled = self.points[:self.current_frame+1]
-        if len(traveled) > 1:
-            self.path_traveled_3d.set_data(traveled[:, 0], traveled[:, 1])
-            self.path_traveled_3d.set_3d_properties(traveled[:, 2])
-
-            # XZ视图
-            self.path_traveled_xz.set_data(traveled[:, 0], traveled[:, 2])
-            self.current_point_xz.set_data([current_pos[0]], [current_pos[2]])
-
-            # XY视图
-            self.path_traveled_xy.set_data(traveled[:, 0], traveled[:, 1])
-            self.current_point_xy.set_data([current_pos[0]], [current_pos[1]])
-
-        # 更新进度条（不触发回调）
+        self._cp_x[0], self._cp_y[0], self._cp_z[0] = current_pos
+        self.current_point_3d.set_data_3d(self._cp_x, self._cp_y, self._cp_z)
+
+        # 更新工具坐标系（直接取预计算的线段）
+        self.tool_axes_lc.set_segments(self.tool_segments[self.current_frame])
+
+        # 已走过的路径（点数未变时不重设数据）
+        n = self.current_frame + 1
+        if n > 1:
+            show_xz = self.ax_xz.get_visible()
+            show_xy = self.ax_xy.get_visible()
+
+            if n != self._path_len:
+                xs, ys, zs = self.decimated_path(n, self.traveled_stride)
+                self.path_traveled_3d.set_data_3d(xs, ys, zs)
+                if show_xz:
+                    self.path_traveled_xz.set_data(xs, zs)  # XZ视图
+                if show_xy:
+                    self.path_traveled_xy.set_data(xs, ys)  # XY视图
+                self._path_len = n
+
+            # 隐藏的2D视图不更新
+            if show_xz:
+                self.current_point_xz.set_data(self._cp_x, self._cp_z)
+            if show_xy:
+                self.current_point_xy.set_data(self._cp_x, self._cp_y)
+
+        # 更新进度条（不触发回调，也不触发整幅重绘；进度条图元随blit_frame重绘）
         self.slider_progress.eventson = False
+        self.slider_progress.drawon = False
         self.slider_progress.set_val(self.current_frame)
+        self.slider_progress.drawon = True
         self.slider_progress.eventson = True
 
-        # 更新信息
-        vel = self.velocities[self.current_frame]
-        cmd_type = self.command_types[self.current_frame]
-        progress = (self.current_frame + 1) / self.total_points * 100
-
-        # 信息显示 (英文)
-        bp_info = f"\nBreakpoint: {self.breakpoint + 1}" if self.breakpoint is not None else "\nBreakpoint: None"
-        info = f"""Progress: {self.current_frame+1}/{self.total_points} ({progress:.1f}%)
-Motion: {cmd_type}
-Velocity: {vel*1000:.0f} mm/s
-Position (TCP):
-  X: {current_pos[0]:8.2f} mm
-  Y: {current_pos[1]:8.2f} mm
-  Z: {current_pos[2]:8.2f} mm
-Orientation:
-  A: {current_ori[0]:8.2f}°
-  B: {current_ori[1]:8.2f}°
-  C: {current_ori[2]:8.2f}°{bp_info}"""
-
-        self.info_text.set_text(info)
-
-    def update_animation(self, frame):
-        """更新动画帧（仅在播放时调用）"""
+        # 更新信息（帧与断点都未变时跳过格式化）
+        info_key = (self.current_frame, self.breakpoint)
+        if info_key != self._info_key:
+            self._info_key = info_key
+            self.info_text.set_text(INFO_TEMPLATE.format(
+                frame=self.current_frame + 1,
+                total=self.total_points,
+                progress=(self.current_frame + 1) / self.total_points * 100,
+                cmd_type=self.command_types[self.current_frame],
+                vel=self.velocities[self.current_frame] * 1000,
+                pos=current_pos,
+                ori=current_ori,
+                bp=self.breakpoint + 1 if self.breakpoint is not None else 'None'))
+
+    def _tick(self):
+        """计时器回调：前进一帧"""
         if not self.is_playing:
+            self.timer.stop()
             return
 
         # 检查是否到达终点
@@ -450,8 +682,10 @@ Orientation:
             self.current_frame = self.total_points - 1
             self.btn_play.label.set_text('Play')
             self.btn_play.color = 'lightgreen'
+            self.timer.stop()
             print(f"✓ Animation completed")
             self.render_current_frame()
+            self.fig.canvas.draw_idle()
             return
 
         # 检查是否到达断点
@@ -460,17 +694,16 @@ Orientation:
             self.current_frame = self.breakpoint
             self.btn_play.label.set_text('Play')
             self.btn_play.color = 'lightgreen'
+            self.timer.stop()
             print(f"⏸ Breakpoint reached at point {self.breakpoint + 1}")
             self.render_current_frame()
+            self.fig.canvas.draw_idle()
             return
 
         # 正常前进一帧
         self.current_frame += 1
         self.render_current_frame()
-
-        return (self.current_point_3d, self.path_traveled_3d,
-                self.current_point_xz, self.path_traveled_xz,
-                self.current_point_xy, self.path_traveled_xy)
+        self.blit_frame()
 
     def toggle_play(self, event):
         """播放/暂停"""
@@ -483,22 +716,21 @@ Orientation:
         if self.is_playing:
             self.btn_play.label.set_text('Pause')  # 暂停
             self.btn_play.color = 'yellow'
-            # 应用当前速度：停止后重启timer
             new_interval = int(50 / self.speed)
-            self.anim.event_source.stop()
-            self.anim.event_source.interval = new_interval
-            self.anim.event_source.start()
+            self.timer.interval = new_interval
+            self.timer.start()
             print(f"▶ Play started at speed {self.speed}x (interval={new_interval}ms)")  # 开始播放
         else:
             self.btn_play.label.set_text('Play')  # 播放
             self.btn_play.color = 'lightgreen'
-            self.anim.event_source.stop()
+            self.timer.stop()
             print(f"⏸ Paused at point {self.current_frame + 1}")  # 暂停
         self.fig.canvas.draw_idle()
 
     def stop_animation(self, event):
         """停止并重置到开头"""
         self.is_playing = False
+        self.timer.stop()
         self.current_frame = 0
         self.btn_play.label.set_text('Play')  # 播放
         self.btn_play.color = 'lightgreen'
@@ -520,21 +752,18 @@ Orientation:
         # speed=5.0 -> interval=10ms (快5倍)
         new_interval = int(50 / self.speed)
 
-        # 如果正在播放，需要重启timer以应用新速度
-        if self.is_playing:
-            self.anim.event_source.stop()
-            self.anim.event_source.interval = new_interval
-            self.anim.event_source.start()
-            print(f"⚙ Speed changed to {self.speed}x (interval={new_interval}ms) - timer restarted")
-        else:
-            self.anim.event_source.interval = new_interval
-            print(f"⚙ Speed set to {self.speed}x (interval={new_interval}ms)")  # 调试信息
+        # 直接修改计时器间隔，播放中从下一帧起生效
+        self.timer.interval = new_interval
+        print(f"⚙ Speed set to {self.speed}x (interval={new_interval}ms)")  # 调试信息
 
     def seek_position(self, val):
         """跳转到指定位置"""
-        self.current_frame = int(val)
+        frame = int(val)
+        if frame == self.current_frame:
+            return
+        self.current_frame = frame
         self.render_current_frame()
-        self.fig.canvas.draw_idle()
+        self.request_redraw()
 
     def step_forward(self, event):
         """单步前进"""
@@ -542,7 +771,7 @@ Orientation:
             self.is_playing = False  # 停止自动播放
             self.current_frame += 1
             self.render_current_frame()
-            self.fig.canvas.draw_idle()
+            self.request_redraw()
             print(f"▶ Step to point {self.current_frame+1}/{self.total_points}")  # 单步到点
         else:
             print("⚠ Already at end")  # 已在终点
@@ -555,7 +784,7 @@ Orientation:
                 self.breakpoint = bp - 1  # 转换为0索引
                 print(f"✓ Breakpoint set at point {bp}")  # 断点已设置
                 self.render_current_frame()  # 刷新显示
-                self.fig.canvas.draw_idle()
+                self.request_redraw()
             else:
                 print(f"✗ Invalid point number. Valid range: 1-{self.total_points}")  # 无效点号
         except ValueError:
@@ -567,7 +796,7 @@ Orientation:
         self.textbox_breakpoint.set_val('')
         print("✓ Breakpoint cleared")  # 断点已清除
         self.render_current_frame()  # 刷新显示
-        self.fig.canvas.draw_idle()
+        self.request_redraw()
 
     def load_file_from_path(self, file_path):
         """Load file from given path / 从给定路径加载文件"""
@@ -592,7 +821,7 @@ Orientation:
 
                 # Update parser
                 self.parser = new_parser
-                self.original_parser = copy.deepcopy(new_parser)
+                self.original_parser = new_parser
 
                 # Reset animation state
                 self.current_frame = 0
@@ -625,15 +854,16 @@ Orientation:
             self.is_playing = False
             self.btn_play.label.set_text('Play')
             self.btn_play.color = 'lightgreen'
-            self.anim.event_source.stop()
+            self.timer.stop()
 
         file_path = None
 
         if HAS_TKINTER:
-            # Use tkinter file dialog
-            root = tk.Tk()
-            root.withdraw()
-            root.attributes('-topmost', True)
+            # Use tkinter file dialog（隐藏的root窗口首次使用时创建，之后复用）
+            if self._tk_root is None:
+                self._tk_root = tk.Tk()
+                self._tk_root.withdraw()
+                self._tk_root.attributes('-topmost', True)
 
             # 支持多种文件类型
             file_path = filedialog.askopenfilename(
@@ -644,10 +874,9 @@ Orientation:
                     ('NC/G-code Files', '*.nc *.NC'),
                     ('All Files', '*.*')
                 ],
-                initialdir='.'
+                initialdir='.',
+                parent=self._tk_root
             )
-
-            root.destroy()
         else:
             # Use simple text-based file picker
             file_path = simple_file_picker(title="Select KUKA file (.src, .nc, .NC)")
@@ -657,14 +886,20 @@ Orientation:
             self.load_file_from_path(file_path)
 
     def recreate_plots(self):
-        """重新创建所有绘图（用于加载新文件）"""
-        # Clear all axes
-        self.ax_3d.clear()
-        self.ax_xz.clear()
-        self.ax_xy.clear()
+        """加载新文件后刷新所有绘图（复用已有绘图对象）"""
+        # 停止播放计时器，旧帧不再绘制
+        self.timer.stop()
+
+        if self.total_points == 0:
+            # 空文件：清空坐标轴显示提示，绘图对象需重新创建
+            self.ax_3d.clear()
+            self.ax_xz.clear()
+            self.ax_xy.clear()
+            self._plots_ready = False
 
         # Reinitialize plots
         self.init_plots()
+        self._init_anim_artists()
 
         # Render first frame
         self.render_current_frame()
@@ -709,6 +944,7 @@ def main():
     print("  速度滑块   - 调整播放速度 (0.1x - 5.0x)")
     print("  进度条     - 拖动跳转到任意位置")
     print("  3D视图     - 可用鼠标旋转查看不同角度")
+    print("  键盘 1/2   - 显示/隐藏侧视图、俯视图")
     print("=" * 60)
 
     animator = KUKAAnimator(parser)
@@ -9,17 +9,25 @@ KUKA File Interactive Graphical Editor
 """
 
 import sys
+import re
+import operator
 import numpy as np
 import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
 from matplotlib.widgets import Button, TextBox, CheckButtons
+from matplotlib.lines import Line2D
+from matplotlib.colors import to_rgba
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 from kuka_src_parser import KUKASrcParser
-import copy
+from kuka_nc_parser import KukaNCParser
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Tuple, Dict
+from dataclasses import dataclass, replace
+from typing import Dict
 import os
-import glob
+import fnmatch
+from functools import lru_cache
+from itertools import chain, compress
 
 # Try to import tkinter for file dialogs (cross-platform)
 try:
@@ -29,6 +37,31 @@ try:
 except ImportError:
     HAS_TKINTER = False
 
+# Try to import numba for JIT-compiled detection scans (optional)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+_NAN_XYZ = (np.nan, np.nan, np.nan)
+
+# 坐标轴名称 -> 位置数组列号
+_AXIS = {'x': 0, 'y': 1, 'z': 2}
+
+# 删除条件: 轴 + 比较符 + 阈值，如 x>10, z<=-5
+_CONDITION = re.compile(r'([xyz])\s*([<>]=?)(.*)')
+_COMPARE = {'<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge}
+
+# 指令类型 -> int8编码，检测器在编码数组上判断类型（其他类型为-1）
+_TYPE_CODES = {'PTP': 0, 'LIN': 1, 'CIRC': 2, 'G00': 3}
+_RAPID_CODES = (_TYPE_CODES['PTP'], _TYPE_CODES['G00'])
+
+# 路径超过此点数时抽稀显示（只影响灰色路径线和速度散点，数据和导出不变）
+PATH_THIN_MIN_POINTS = 20000
+POINT_ALPHA = 0.6  # 速度散点的透明度
+
 
 def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.NC"]):
     """Simple text-based file picker when GUI not available"""
@@ -36,18 +69,17 @@ def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.N
     print(f"{title}")
     print(f"{'=' * 60}")
 
-    # 收集所有匹配的文件
-    all_files = []
-    for pattern in file_patterns:
-        all_files.extend(glob.glob(pattern))
-
-    # 去重并排序
-    all_files = sorted(set(all_files))
+    # 扫描当前目录一次收集所有匹配的文件，文件大小取自目录项缓存的stat
+    with os.scandir('.') as it:
+        entries = sorted((e.name, e.stat().st_size) for e in it
+                         if not e.name.startswith('.') and e.is_file()
+                         and any(fnmatch.fnmatch(e.name, p) for p in file_patterns))
+    all_files = [name for name, _ in entries]
 
     if all_files:
         print(f"\nAvailable files (.src, .nc, .NC):")
-        for i, f in enumerate(all_files, 1):
-            size = os.path.getsize(f) / 1024  # KB
+        for i, (f, size) in enumerate(entries, 1):
+            size = size / 1024  # KB
             file_type = f.split('.')[-1].upper()
             print(f"  [{i}] {f:<30} ({size:.1f} KB) [{file_type}]")
 
@@ -77,8 +109,127 @@ def simple_file_picker(title="Select file", file_patterns=["*.src", "*.nc", "*.N
             return None
 
 
+@lru_cache(maxsize=8)
+def _parse_offset(sx, sy, sz):
+    """Convert offset strings to floats / 偏移量字符串转浮点数（重复点击时命中缓存）"""
+    return float(sx), float(sy), float(sz)
+
+
+def thin_polyline(points, tol):
+    """Indices of polyline vertices worth drawing / 折线抽稀，返回保留的顶点索引
+    Two passes; each drops vertices closer than tol/2 to the segment between
+    their neighbours, never two adjacent ones, so every dropped vertex stays
+    within tol of the drawn line. Reversals (drill down/up) are kept.
+    """
+    keep = np.arange(len(points))
+    tol2 = (tol / 2) ** 2
+    for _ in range(2):
+        if len(keep) < 3:
+            break
+        p = points[keep]
+        chord = p[2:] - p[:-2]
+        rel = p[1:-1] - p[:-2]
+        # 到线段（而非直线）的距离，原路返回的点不会被当作共线点去掉
+        len2 = np.einsum('ij,ij->i', chord, chord)
+        t = np.einsum('ij,ij->i', rel, chord) / np.where(len2 > 0, len2, 1.0)
+        off = rel - np.clip(t, 0.0, 1.0)[:, None] * chord
+        near = np.zeros(len(keep), dtype=bool)
+        near[1:-1] = np.einsum('ij,ij->i', off, off) < tol2
+
+        # 连续的可删点只删隔一个的，保证被删点两侧的邻点都保留
+        i = np.arange(len(keep))
+        run_start = np.maximum.accumulate(np.where(near, -1, i))
+        drop = near & ((i - run_start) % 2 == 1)
+        if not drop.any():
+            break
+        keep = keep[~drop]
+    return keep
+
+
+def merge_markers(points, group, tol):
+    """Merge markers falling in the same tol-sized cell / 合并落在同一小格内的同类标记点
+    group: small non-negative int per point (e.g. color class); only markers of
+    the same group are merged. Returns (rows, counts): the first row of each
+    occupied cell in original order and how many markers it stands for, or
+    None when the grid is too fine to index (deep zoom on a huge workspace).
+    """
+    cells = np.floor(points / tol)
+    cells -= cells.min(axis=0)
+    dims = cells.max(axis=0) + 1
+    n_groups = int(group.max()) + 1 if len(group) else 1
+    if np.prod(dims) * n_groups >= 2.0 ** 62:
+        return None
+    cells = cells.astype(np.int64)
+    dims = dims.astype(np.int64)
+    key = ((cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]) * n_groups + group
+    _, rows, counts = np.unique(key, return_index=True, return_counts=True)
+    order = np.argsort(rows)
+    return rows[order], counts[order]
+
+
 # ===== Operation Detection Classes =====
 
+def motion_positions(motion_commands):
+    """Collect XYZ of all commands into one (N, 3) array / 收集所有指令的XYZ坐标
+    Row i belongs to motion_commands[i]; commands without position are NaN
+    """
+    # fromiter直接填充数组，不经过中间的元组列表。
+    # 直接访问属性：Python 3.11+ 对属性访问做了特化，比 attrgetter 更快
+    xyz = chain.from_iterable((p.x, p.y, p.z) if (p := cmd.position) else _NAN_XYZ
+                              for cmd in motion_commands)
+    return np.fromiter(xyz, dtype=float, count=3 * len(motion_commands)).reshape(-1, 3)
+
+
+def _scan_operations(drill_3step, drill_4step, contour_start, lin_pos, next_gap, pos):
+    """Whole detection scan as one scalar loop (numba only) / 整个检测扫描的标量循环版本
+    Same rules as the loop in OperationDetector.detect_all_operations.
+    Returns (drill_starts, contour_starts, contour_ends).
+    """
+    n = pos.shape[0]
+    drill_starts = np.empty(n // 3 + 1, dtype=np.int32)
+    contour_starts = np.empty(n, dtype=np.int32)
+    contour_ends = np.empty(n, dtype=np.int32)
+    drill_count = 0
+    contour_count = 0
+
+    i = 0
+    while i < n:
+        if drill_3step[i] or drill_4step[i]:
+            drill_starts[drill_count] = i
+            drill_count += 1
+            i += 3 if drill_3step[i] else 4
+
+        elif contour_start[i]:
+            # 轮廓结束位置：下一个中断点之前第一个Z变化>=2mm的LIN
+            end = n
+            if i + 1 < n:
+                end = next_gap[i + 1]
+                base_z = pos[i, 2]
+                for j in range(i + 1, next_gap[i + 1]):
+                    if lin_pos[j] and not abs(pos[j, 2] - base_z) < 2.0:
+                        end = j
+                        break
+            contour_starts[contour_count] = i
+            contour_ends[contour_count] = end
+            contour_count += 1
+
+            step = 0
+            for j in range(i, end):
+                if lin_pos[j]:
+                    step += 1
+            i += step
+
+        else:
+            i += 1
+
+    return drill_starts[:drill_count], contour_starts[:contour_count], contour_ends[:contour_count]
+
+
+if HAS_NUMBA:
+    # 检测只在加载/修改后运行一次；cache=True 避免每次启动重新编译。
+    _scan_operations = njit(cache=True)(_scan_operations)
+
+
 class OperationType(Enum):
     """Operation type enumeration / 操作类型枚举"""
     DRILLING = "drilling"        # 钻孔
@@ -91,9 +242,9 @@ class OperationGroup:
     """Operation group data structure / 操作组数据结构"""
     name: str                    # e.g., "Drilling_1", "Contour_1"
     type: OperationType          # DRILLING or CONTOURING
-    indices: List[int]           # Indices in motion_commands
-    center: np.ndarray           # Center point coordinates
-    bounds: Tuple[float, ...]    # Bounding box (xmin, xmax, ymin, ymax, zmin, zmax)
+    indices: np.ndarray          # Indices in motion_commands (int32)
+    center: np.ndarray           # Center point coordinates (3,)
+    bounds: np.ndarray           # Bounding box (6,): xmin, xmax, ymin, ymax, zmin, zmax
     properties: Dict             # Additional properties
 
 
@@ -104,22 +255,31 @@ class OperationDetector:
         self.motion_commands = motion_commands
         self.drilling_operations = []
         self.contouring_operations = []
+
+        # 一次性取出所有坐标和指令类型，钻孔模式用数组整体判断
+        self.positions = motion_positions(motion_commands)
+        self.has_pos = ~np.isnan(self.positions[:, 0])
         self.z_direction = self._detect_z_direction()
+        self.type_codes = np.fromiter((_TYPE_CODES.get(cmd.command_type, -1) for cmd in motion_commands),
+                                      dtype=np.int8, count=len(motion_commands))
+        self.is_lin = self.type_codes == _TYPE_CODES['LIN']
+        self.is_ptp = self.type_codes == _TYPE_CODES['PTP']
+        self.lin_pos = self.is_lin & self.has_pos
+        self.next_gap = self._find_command_gaps()
+        self.drill_3step, self.drill_4step = self._find_drilling_patterns()
+        self.contour_start = self._find_contour_starts()
 
     def _detect_z_direction(self):
         """Detect Z coordinate system direction / 检测Z坐标系方向
         Returns: 'negative' if most Z coords are negative, 'positive' if positive
         """
-        z_coords = []
-        for cmd in self.motion_commands:
-            if cmd.position:
-                z_coords.append(cmd.position.z)
+        z_coords = self.positions[self.has_pos, 2]
 
-        if not z_coords:
+        if len(z_coords) == 0:
             return 'negative'  # Default
 
         # Calculate average Z
-        avg_z = sum(z_coords) / len(z_coords)
+        avg_z = z_coords.mean()
 
         # Detect direction based on average
         if avg_z < 0:
@@ -131,161 +291,207 @@ class OperationDetector:
 
     def detect_all_operations(self):
         """Detect all operations in the program / 检测程序中的所有操作"""
-        i = 0
+        if HAS_NUMBA:
+            # 整个扫描编译为本地代码一次完成
+            drill_starts, contour_starts, contour_ends = _scan_operations(
+                self.drill_3step, self.drill_4step, self.contour_start, self.lin_pos,
+                self.next_gap, self.positions)
+        else:
+            drill_starts, contour_starts, contour_ends = self._scan_operations()
+
+        self.drilling_operations = [
+            self._extract_drilling_group(start, k)
+            for k, start in enumerate(drill_starts.tolist())
+        ]
+        self.contouring_operations = [
+            self._extract_contour_group(start, k, end)
+            for k, (start, end) in enumerate(zip(contour_starts.tolist(), contour_ends.tolist()))
+        ]
+
+        # 后处理：将大孔（闭合环形轮廓）识别为钻孔操作
+        self._convert_large_holes_to_drilling()
+
+        print(f"✓ Detected {len(self.drilling_operations)} drilling operations")
+        print(f"✓ Detected {len(self.contouring_operations)} contour operations")
+
+        return self.drilling_operations, self.contouring_operations
+
+    def _scan_operations(self):
+        """Find drilling starts and contour runs / 扫描钻孔起点和轮廓段
+        Returns (drill_starts, contour_starts, contour_ends) as int32 arrays.
+        """
+        n = len(self.motion_commands)
+
+        # 扫描时只记录起止位置到预分配的缓冲区，最后统一生成操作组
+        # 每个钻孔至少占3条指令，每个轮廓至少1条
+        drill_starts = np.empty(n // 3 + 1, dtype=np.int32)
+        contour_starts = np.empty(n, dtype=np.int32)
+        contour_ends = np.empty(n, dtype=np.int32)
         drill_count = 0
         contour_count = 0
 
-        while i < len(self.motion_commands):
+        # 只有钻孔起点或带坐标的LIN才可能匹配，其余位置直接跳过
+        candidate = self.drill_3step | self.drill_4step | self.lin_pos
+        next_candidate = np.full(n + 1, n)
+        next_candidate[:n] = np.where(candidate, np.arange(n), n)
+        next_candidate = np.minimum.accumulate(next_candidate[::-1])[::-1].tolist()
+
+        i = next_candidate[0]
+        while i < n:
             # Check for drilling pattern
             if self._is_drilling_pattern(i):
-                drill_group = self._extract_drilling_group(i, drill_count)
-                self.drilling_operations.append(drill_group)
-                i += len(drill_group.indices)
+                drill_starts[drill_count] = i
                 drill_count += 1
+                i += 3 if self.drill_3step[i] else 4
 
             # Check for contouring pattern
             elif self._is_contouring_pattern(i):
-                contour_group = self._extract_contour_group(i, contour_count)
-                self.contouring_operations.append(contour_group)
-                i += len(contour_group.indices)
+                end = self._contour_run_end(i)
+                contour_starts[contour_count] = i
+                contour_ends[contour_count] = end
                 contour_count += 1
+                i += int(np.count_nonzero(self.lin_pos[i:end]))
 
             else:
                 i += 1
 
-        # 后处理：将大孔（闭合环形轮廓）识别为钻孔操作
-        self._convert_large_holes_to_drilling()
-
-        print(f"✓ Detected {len(self.drilling_operations)} drilling operations")
-        print(f"✓ Detected {len(self.contouring_operations)} contour operations")
+            i = next_candidate[i]
 
-        return self.drilling_operations, self.contouring_operations
+        return (drill_starts[:drill_count], contour_starts[:contour_count],
+                contour_ends[:contour_count])
 
-    def _is_drilling_pattern(self, start_idx):
-        """Check if drilling pattern exists / 检查是否为钻孔模式
+    def _find_drilling_patterns(self):
+        """Find drilling pattern starts for all indices at once / 一次性找出所有钻孔模式起点
         Pattern:
         - KUKA .src: Fast down -> Fast approach -> Slow drill -> Fast up (4 steps)
         - NC G-code: Fast to high -> Slow drill down -> Fast up (3 steps)
+        Returns two boolean arrays (3-step, 4-step) indexed by start index
         """
-        # 先检查3步模式 (NC/G-code钻孔)
-        if start_idx + 2 < len(self.motion_commands):
-            cmds_3 = self.motion_commands[start_idx:start_idx+3]
-
-            # 检查指令类型的多种组合:
-            # 模式1: PTP(G00) -> LIN(G01) -> PTP(G00)
-            # 模式2: LIN -> LIN -> PTP (404座板.NC.nc的模式)
-            is_valid_type_pattern = False
-
-            if len(cmds_3) == 3:
-                types = [cmd.command_type for cmd in cmds_3]
-
-                # 模式1: PTP -> LIN -> PTP
-                if types == ['PTP', 'LIN', 'PTP']:
-                    is_valid_type_pattern = True
-
-                # 模式2: LIN -> LIN -> PTP (快速到高位->进给下钻->快速退回)
-                elif types == ['LIN', 'LIN', 'PTP']:
-                    is_valid_type_pattern = True
-
-                # 模式3: 任意 -> LIN -> PTP (通用模式)
-                elif types[1] == 'LIN' and types[2] == 'PTP':
-                    is_valid_type_pattern = True
-
-            if is_valid_type_pattern:
-                # 检查都有坐标
-                if all(cmd.position for cmd in cmds_3):
-                    z_coords = [cmd.position.z for cmd in cmds_3]
-                    x_coords = [cmd.position.x for cmd in cmds_3]
-                    y_coords = [cmd.position.y for cmd in cmds_3]
-
-                    # 检查XY基本不变（钻孔在同一XY位置）
-                    x_range = max(x_coords) - min(x_coords)
-                    y_range = max(y_coords) - min(y_coords)
-
-                    if x_range < 50.0 and y_range < 50.0:  # 放宽到50mm容差
-                        # 检查Z坐标模式：高->低->高 (向下钻孔)
-                        if z_coords[0] > z_coords[1] and z_coords[2] > z_coords[1]:
-                            z_depth = z_coords[0] - z_coords[1]
-                            # 钻孔深度应该合理（5mm以上）
-                            if z_depth > 5.0:
-                                return True
-
-        # 检查4步模式 (KUKA .src钻孔)
-        if start_idx + 3 >= len(self.motion_commands):
-            return False
-
-        # Check 4 consecutive LIN commands
-        cmds = self.motion_commands[start_idx:start_idx+4]
-        for cmd in cmds:
-            if cmd.command_type != 'LIN' or not cmd.position:
-                return False
-
-        # Check Z-coordinate pattern: high -> mid -> low -> high
-        z_coords = [cmd.position.z for cmd in cmds]
-
-        # Pattern recognition: Z decreases then increases
-        if (z_coords[0] > z_coords[1] > z_coords[2] and z_coords[3] > z_coords[2]):
-            # Check X, Y remain constant (drilling at same XY position)
-            x_coords = [cmd.position.x for cmd in cmds]
-            y_coords = [cmd.position.y for cmd in cmds]
+        n = len(self.motion_commands)
+        has_pos = self.has_pos
+        drill_3step = np.zeros(n, dtype=bool)
+        drill_4step = np.zeros(n, dtype=bool)
+
+        # 3步模式 (NC/G-code钻孔)
+        # 指令类型: 任意 -> LIN -> PTP（包含 PTP->LIN->PTP 和 LIN->LIN->PTP）
+        if n >= 3:
+            x, y, z = (sliding_window_view(self.positions[:, k], 3) for k in range(3))
+            ok = self.is_lin[1:-1] & self.is_ptp[2:]
+            ok &= sliding_window_view(has_pos, 3).all(axis=1)
+            # XY基本不变（钻孔在同一XY位置，放宽到50mm容差）
+            ok &= (np.ptp(x, axis=1) < 50.0) & (np.ptp(y, axis=1) < 50.0)
+            # Z坐标模式：高->低->高 (向下钻孔)，深度5mm以上
+            ok &= (z[:, 0] > z[:, 1]) & (z[:, 2] > z[:, 1]) & (z[:, 0] - z[:, 1] > 5.0)
+            drill_3step[:n - 2] = ok
+
+        # 4步模式 (KUKA .src钻孔)：4个连续LIN
+        if n >= 4:
+            x, y, z = (sliding_window_view(self.positions[:, k], 4) for k in range(3))
+            ok = sliding_window_view(self.is_lin & has_pos, 4).all(axis=1)
+            # Z-coordinate pattern: high -> mid -> low -> high
+            ok &= (z[:, 0] > z[:, 1]) & (z[:, 1] > z[:, 2]) & (z[:, 3] > z[:, 2])
+            # XY variation should be very small (<1mm)
+            ok &= (np.ptp(x, axis=1) < 1.0) & (np.ptp(y, axis=1) < 1.0)
+            drill_4step[:n - 3] = ok
 
-            x_range = max(x_coords) - min(x_coords)
-            y_range = max(y_coords) - min(y_coords)
+        return drill_3step, drill_4step
 
-            # XY variation should be very small (<1mm)
-            if x_range < 1.0 and y_range < 1.0:
-                return True
+    def _find_contour_starts(self):
+        """Contour pattern test for all indices at once / 一次性判断所有位置是否为轮廓起点
+        Rules as in _is_contouring_pattern; the 5 points of a start are the
+        next 5 commands with position, so windows over those rows cover all starts.
+        """
+        n = len(self.motion_commands)
+        contour_start = np.zeros(n, dtype=bool)
+        valid = np.flatnonzero(self.has_pos)
+        if len(valid) < 5:
+            return contour_start
+
+        # 每5个相邻有坐标点的窗口：Z范围、平均Z、XY移动距离
+        pts = self.positions[valid]
+        z = sliding_window_view(pts[:, 2], 5)
+        dx, dy = np.diff(pts[:, 0]), np.diff(pts[:, 1])
+        xy = sliding_window_view(np.sqrt(dx * dx + dy * dy), 4)
+        # 按列依次相加，与逐点累加的求和顺序一致，阈值附近结果不变
+        avg_z = sum(z[:, k] for k in range(5)) / 5
+        xy_motion = sum(xy[:, k] for k in range(4))
+        if self.z_direction == 'negative':
+            at_depth = avg_z < -20.0
+        else:
+            at_depth = avg_z > 20.0
+        window_ok = (np.ptp(z, axis=1) < 2.0) & at_depth & (xy_motion > 1.0)
+
+        # 起点（带坐标的LIN）本身就是其窗口的第一个点
+        starts = np.flatnonzero(self.lin_pos)
+        row = np.searchsorted(valid, starts)
+        has_window = row + 4 < len(valid)
+        starts, row = starts[has_window], row[has_window]
+        # 5个点必须在起点之后的20条指令内
+        ok = window_ok[row] & (valid[row + 4] < starts + 20)
+        contour_start[starts[ok]] = True
+        return contour_start
+
+    def _find_command_gaps(self):
+        """For every index, where the next run of 3 non-machining commands ends
+        下一处连续3条非加工指令（非LIN或无位置）结束的位置，没有则为N；轮廓在此中断
+        """
+        n = len(self.motion_commands)
+        gap = ~self.lin_pos
+        gap_end = np.full(n, n)
+        if n >= 3:
+            triple = gap[2:] & gap[1:-1] & gap[:-2]
+            gap_end[2:] = np.where(triple, np.arange(2, n), n)
+        # 反向累计最小值：每个位置之后最近的中断点
+        return np.minimum.accumulate(gap_end[::-1])[::-1]
+
+    def _contour_run_end(self, start_idx):
+        """End (exclusive) of the contour run starting at start_idx / 轮廓段结束位置
+        The run stops at the first LIN whose Z leaves base_z by 2mm or more, or
+        where more than 2 consecutive non-machining commands occur (如PTP定位).
+        Every LIN-with-position command in [start_idx, end) belongs to the contour.
+        """
+        n = len(self.motion_commands)
+        if start_idx + 1 >= n:
+            return n
+        # 只在下一个中断点之前查找Z变化过大的点；窗口逐步加倍，
+        # 没有中断点的长程序也不必每个轮廓都扫描到文件末尾
+        gap_end = int(self.next_gap[start_idx + 1])
+        base_z = self.positions[start_idx, 2]
+        lo = start_idx + 1
+        step = 64
+        while lo < gap_end:
+            hi = min(lo + step, gap_end)
+            z_break = self.lin_pos[lo:hi] & ~(np.abs(self.positions[lo:hi, 2] - base_z) < 2.0)
+            if z_break.any():
+                return lo + int(np.argmax(z_break))
+            lo = hi
+            step *= 2
+        return gap_end
 
-        return False
+    def _is_drilling_pattern(self, start_idx):
+        """Check if drilling pattern exists / 检查是否为钻孔模式"""
+        return bool(self.drill_3step[start_idx] or self.drill_4step[start_idx])
 
     def _extract_drilling_group(self, start_idx, drill_num):
         """Extract drilling operation group / 提取钻孔操作组"""
-        # 先检查是3步还是4步模式
-        step_count = 4  # 默认4步（KUKA .src）
-
-        # 检查是否为3步模式 (NC G-code)
-        if start_idx + 2 < len(self.motion_commands):
-            cmds_3 = self.motion_commands[start_idx:start_idx+3]
-            if len(cmds_3) == 3 and all(cmd.position for cmd in cmds_3):
-                types = [cmd.command_type for cmd in cmds_3]
-
-                # 检查多种3步模式
-                is_3step = False
-                if types == ['PTP', 'LIN', 'PTP'] or types == ['LIN', 'LIN', 'PTP']:
-                    is_3step = True
-                elif types[1] == 'LIN' and types[2] == 'PTP':
-                    is_3step = True
-
-                if is_3step:
-                    z_coords_test = [cmd.position.z for cmd in cmds_3]
-                    if z_coords_test[0] > z_coords_test[1] and z_coords_test[2] > z_coords_test[1]:
-                        step_count = 3
+        # 3步模式 (NC G-code) 或4步模式（KUKA .src），由 _find_drilling_patterns 判定
+        step_count = 3 if self.drill_3step[start_idx] else 4
 
-        indices = list(range(start_idx, start_idx + step_count))
+        indices = np.arange(start_idx, start_idx + step_count, dtype=np.int32)
+        pts = self.positions[start_idx:start_idx + step_count]
 
         # Calculate center point (use first point's XY, average Z)
-        first_cmd = self.motion_commands[start_idx]
-        center_x = first_cmd.position.x
-        center_y = first_cmd.position.y
-
-        z_coords = [self.motion_commands[i].position.z for i in indices if i < len(self.motion_commands)]
-        center_z = sum(z_coords) / len(z_coords) if z_coords else 0
-
-        center = np.array([center_x, center_y, center_z])
+        center = np.array([pts[0, 0], pts[0, 1], pts[:, 2].mean()])
 
         # Calculate bounds
-        all_coords = [(self.motion_commands[i].position.x,
-                      self.motion_commands[i].position.y,
-                      self.motion_commands[i].position.z) for i in indices
-                      if i < len(self.motion_commands) and self.motion_commands[i].position]
-        xs, ys, zs = zip(*all_coords)
-        bounds = (min(xs), max(xs), min(ys), max(ys), min(zs), max(zs))
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        bounds = np.column_stack([lo, hi]).ravel()
 
         # Extract properties
         properties = {
-            'drill_depth': max(z_coords) - min(z_coords),
-            'safe_height': max(z_coords),
-            'bottom_depth': min(z_coords),
+            'drill_depth': float(hi[2] - lo[2]),
+            'safe_height': float(hi[2]),
+            'bottom_depth': float(lo[2]),
             'step_count': step_count
         }
 
@@ -303,29 +509,27 @@ class OperationDetector:
         # 识别需要转换的轮廓
         large_hole_contours = []
         remaining_contours = []
+        n = len(self.motion_commands)
 
         for contour in self.contouring_operations:
             # 获取轮廓点
-            points = [self.motion_commands[i].position for i in contour.indices
-                     if i < len(self.motion_commands) and self.motion_commands[i].position]
+            idx = contour.indices[contour.indices < n]
+            points = self.positions[idx[self.has_pos[idx]]]
 
-            if not points:
+            # 大孔至少21个点；点数不够的直接保留，不必计算半径
+            if len(points) <= 20:
                 remaining_contours.append(contour)
                 continue
 
             # 计算半径
-            center_x = contour.center[0]
-            center_y = contour.center[1]
-            distances = [np.sqrt((p.x - center_x)**2 + (p.y - center_y)**2) for p in points]
-            avg_radius = sum(distances) / len(distances)
+            distances = np.hypot(points[:, 0] - contour.center[0], points[:, 1] - contour.center[1])
+            avg_radius = float(distances.mean())
 
             # 检查闭合度
-            start = np.array([points[0].x, points[0].y])
-            end = np.array([points[-1].x, points[-1].y])
-            closure = np.linalg.norm(end - start)
+            closure = np.hypot(*(points[-1, :2] - points[0, :2]))
 
             # 大孔条件：半径2-20mm，点数>20，闭合良好(<10mm)
-            if 2.0 < avg_radius < 20.0 and len(points) > 20 and closure < 10.0:
+            if 2.0 < avg_radius < 20.0 and closure < 10.0:
                 large_hole_contours.append((contour, avg_radius))
             else:
                 remaining_contours.append(contour)
@@ -333,41 +537,39 @@ class OperationDetector:
         # 将大孔转换为钻孔操作
         drill_start_num = len(self.drilling_operations)
         for i, (contour, radius) in enumerate(large_hole_contours):
-            # 获取轮廓的索引列表（副本）
-            indices = list(contour.indices)
-
             # 向前查找并包含快速定位指令（作为钻孔操作的一部分）
             # 这样移动和删除时会一起处理
-            start_idx = indices[0]
-            end_idx = indices[-1]
+            # 过渡指令只在轮廓前3条/后2条指令中查找，按位置而非空间范围，逐条判断即可
+            start_idx = int(contour.indices[0])
+            end_idx = int(contour.indices[-1])
             transition_indices_before = []
             transition_indices_after = []
 
             # 向前查找进入孔的过渡指令
             for idx in range(max(0, start_idx - 3), start_idx):
-                cmd = self.motion_commands[idx]
-                if cmd.position:
+                if self.has_pos[idx]:
                     # 检查是否是快速定位到这个孔附近（XY距离<100mm，Z>600mm）
-                    dx = cmd.position.x - contour.center[0]
-                    dy = cmd.position.y - contour.center[1]
+                    x, y, z = self.positions[idx]
+                    dx = x - contour.center[0]
+                    dy = y - contour.center[1]
                     distance = (dx**2 + dy**2)**0.5
 
-                    if distance < 100.0 and cmd.position.z > 600.0:
+                    if distance < 100.0 and z > 600.0:
                         # 这是定位到当前孔的指令，应该包含在钻孔操作中
                         transition_indices_before.append(idx)
 
             # 向后查找退出孔的快速返回指令
             # 查找紧接在轮廓结束后的1-2个指令
-            for idx in range(end_idx + 1, min(end_idx + 3, len(self.motion_commands))):
-                cmd = self.motion_commands[idx]
-                if cmd.position:
+            for idx in range(end_idx + 1, min(end_idx + 3, n)):
+                if self.has_pos[idx]:
                     # 检查是否是快速返回到安全高度（Z>600mm，且命令类型为PTP/G00）
                     # 且XY位置接近孔中心（距离<100mm）
-                    dx = cmd.position.x - contour.center[0]
-                    dy = cmd.position.y - contour.center[1]
+                    x, y, z = self.positions[idx]
+                    dx = x - contour.center[0]
+                    dy = y - contour.center[1]
                     distance = (dx**2 + dy**2)**0.5
 
-                    if distance < 100.0 and cmd.position.z > 600.0 and cmd.command_type in ['PTP', 'G00']:
+                    if distance < 100.0 and z > 600.0 and self.type_codes[idx] in _RAPID_CODES:
                         # 这是从当前孔快速退回的指令
                         transition_indices_after.append(idx)
                     else:
@@ -375,7 +577,8 @@ class OperationDetector:
                         break
 
             # 将过渡指令添加到索引的开头和结尾
-            indices = transition_indices_before + indices + transition_indices_after
+            indices = np.concatenate([transition_indices_before, contour.indices,
+                                      transition_indices_after]).astype(np.int32)
 
             # 创建钻孔操作组
             drill_op = OperationGroup(
@@ -401,119 +604,31 @@ class OperationDetector:
     def _is_contouring_pattern(self, start_idx):
         """Check if contouring pattern exists / 检查是否为轮廓加工模式
         Pattern: Z remains relatively constant, XY changes continuously
+        - start is a LIN command with position (排除PTP快速定位)
+        - first 5 points (within 20 commands): Z range < 2mm, at machining depth
+          (Z < -20mm for negative Z systems, > 20mm for positive), XY motion > 1mm
         """
-        if start_idx >= len(self.motion_commands):
-            return False
-
-        # 只检查LIN指令作为轮廓起点（排除PTP快速定位）
-        start_cmd = self.motion_commands[start_idx]
-        if start_cmd.command_type != 'LIN' or not start_cmd.position:
-            return False
-
-        # Check at least 5 consecutive points with positions
-        # 向后查找足够的点（最多检查20个指令以收集5个有效点）
-        z_coords = []
-        xy_positions = []
-        check_limit = min(start_idx + 20, len(self.motion_commands))
-
-        for idx in range(start_idx, check_limit):
-            cmd = self.motion_commands[idx]
-            if cmd.position:
-                z_coords.append(cmd.position.z)
-                xy_positions.append((cmd.position.x, cmd.position.y))
-                if len(z_coords) >= 5:
-                    break
-
-        if len(z_coords) < 5:
-            return False
-
-        # Z should remain relatively constant (within 2mm)
-        z_range = max(z_coords) - min(z_coords)
-
-        # Check if Z is at "machining depth" range
-        avg_z = sum(z_coords) / len(z_coords)
+        return start_idx < len(self.contour_start) and bool(self.contour_start[start_idx])
 
-        # Adaptive Z direction detection
-        # For negative Z: below -20mm (machining below reference)
-        # For positive Z: above 300mm (machining above reference, like A005SM at ~391mm)
-        z_threshold_min = 20.0  # Minimum depth threshold
-
-        if self.z_direction == 'negative':
-            # Negative Z system: machining below reference plane
-            z_at_machining_depth = avg_z < -z_threshold_min
-        else:
-            # Positive Z system: machining above reference plane
-            z_at_machining_depth = avg_z > z_threshold_min
-
-        # Check XY movement (contours should have significant XY motion)
-        if len(xy_positions) >= 2:
-            xy_distances = []
-            for i in range(1, len(xy_positions)):
-                dx = xy_positions[i][0] - xy_positions[i-1][0]
-                dy = xy_positions[i][1] - xy_positions[i-1][1]
-                distance = (dx**2 + dy**2)**0.5
-                xy_distances.append(distance)
-
-            total_xy_motion = sum(xy_distances)
-        else:
-            total_xy_motion = 0
-
-        # Contouring criteria:
-        # 1. Z variation is small (within 2mm)
-        # 2. Z is at machining depth
-        # 3. XY motion is significant (>1mm total for 5 points, 降低阈值以识别小圆弧)
-        if z_range < 2.0 and z_at_machining_depth and total_xy_motion > 1.0:
-            return True
-
-        return False
-
-    def _extract_contour_group(self, start_idx, contour_num):
+    def _extract_contour_group(self, start_idx, contour_num, end=None):
         """Extract contour operation group / 提取轮廓操作组"""
         # Find all consecutive points with similar Z
-        indices = [start_idx]
-        base_z = self.motion_commands[start_idx].position.z
+        if end is None:
+            end = self._contour_run_end(start_idx)
+        indices = (np.flatnonzero(self.lin_pos[start_idx:end]) + start_idx).astype(np.int32)
 
-        i = start_idx + 1
-        consecutive_breaks = 0  # 连续中断计数
-
-        while i < len(self.motion_commands):
-            cmd = self.motion_commands[i]
-
-            # 如果是LIN指令且有位置信息
-            if cmd.command_type == 'LIN' and cmd.position:
-                if abs(cmd.position.z - base_z) < 2.0:  # Same Z level
-                    indices.append(i)
-                    consecutive_breaks = 0  # 重置中断计数
-                    i += 1
-                else:
-                    # Z变化过大，轮廓结束
-                    break
-            else:
-                # 非LIN指令或无位置，允许少量中断（如PTP定位）
-                consecutive_breaks += 1
-                if consecutive_breaks > 2:  # 连续超过2个非加工指令，轮廓结束
-                    break
-                i += 1
-
-        # Calculate center
-        points = [self.motion_commands[i].position for i in indices if self.motion_commands[i].position]
-        if not points:
+        # 轮廓中的指令都有坐标（见 _contour_run_end）
+        pts = self.positions[indices]
+        if len(pts) == 0:
             return None
 
-        center_x = sum(p.x for p in points) / len(points)
-        center_y = sum(p.y for p in points) / len(points)
-        center_z = sum(p.z for p in points) / len(points)
-        center = np.array([center_x, center_y, center_z])
-
-        # Calculate bounds
-        xs = [p.x for p in points]
-        ys = [p.y for p in points]
-        zs = [p.z for p in points]
-        bounds = (min(xs), max(xs), min(ys), max(ys), min(zs), max(zs))
+        # Calculate center and bounds
+        center = pts.mean(axis=0)
+        bounds = np.column_stack([pts.min(axis=0), pts.max(axis=0)]).ravel()
 
         properties = {
             'point_count': len(indices),
-            'machining_depth': center_z
+            'machining_depth': float(center[2])
         }
 
         return OperationGroup(
@@ -531,16 +646,50 @@ class InteractiveKUKAEditor:
 
     def __init__(self, parser: KUKASrcParser = None):
         self.parser = parser
-        self.original_parser = copy.deepcopy(parser) if parser else None
+        self._snapshot = None  # 撤销用的原始状态（见 _take_snapshot）
+        self._tk_root = None  # 文件对话框的Tk根窗口（首次打开对话框时创建）
+        self._info_dirty = False  # 统计面板待刷新（见 update_info）
 
         # Initialize data structures
         self.points = []
         self.point_indices = []
-        self.colors = []
+        self.colors = np.empty((0, 4), dtype=np.float32)
+        self._slow = np.zeros(0, dtype=bool)  # 与colors对应的慢速点掩码
+        self._pts = np.empty((0, 3))
+        self._vel = np.empty(0)
+        self._has_aux = np.zeros(0, dtype=bool)
+        self._aux_indices = []
+        self._dirty = True  # 解析器被修改后置位，下次重绘时重建数组
         self.drilling_operations = []
         self.contouring_operations = []
-        self.selected_drilling_names = set()
-        self.selected_contour_names = set()
+        # 各操作的center/bounds是这些连续数组的行视图（见 _set_operations）
+        self._drill_centers = np.empty((0, 3))
+        self._drill_bounds = np.empty((0, 6))
+        self._contour_centers = np.empty((0, 3))
+        self._contour_bounds = np.empty((0, 6))
+        self._drill_rows: Dict[str, int] = {}
+        self._contour_rows: Dict[str, int] = {}
+        # 所有轮廓的指令行号拼接，及每个行号所属的轮廓序号（见 _contour_segments）
+        self._contour_idx = np.empty(0, dtype=np.intp)
+        self._contour_idx_op = np.empty(0, dtype=np.intp)
+        # 选中的操作: name -> OperationGroup，移动/删除时直接遍历，无需再扫描全部操作
+        self.selected_drilling_ops: Dict[str, OperationGroup] = {}
+        self.selected_contour_ops: Dict[str, OperationGroup] = {}
+        self._path_line = None
+        self._points_scatter = None
+        self._points_scatter_colors = None  # 散点图当前使用的colors数组
+        self._start_scatter = None
+        self._end_scatter = None
+        self._drill_scatter = None
+        self._contour_lines = None
+        self._contour_line_names = []
+        self._path_tol = None  # 路径线当前的抽稀容差（None: 需要重新设置顶点）
+
+        # 可点击对象的屏幕坐标缓存（视角或数据变化时重建）
+        self._screen_world = None  # (drill_centers, contour_pts, contour_owner) 世界坐标
+        self._screen_xy = None
+        self._screen_key = None
+        self._screen_dirty = True
 
         # Initialize view state variables
         self.initial_xlim = None
@@ -551,6 +700,7 @@ class InteractiveKUKAEditor:
         # Extract data if parser is provided
         if parser:
             self.extract_data()
+            self._take_snapshot()
 
         # Create GUI / 创建GUI
         self.create_gui()
@@ -558,32 +708,207 @@ class InteractiveKUKAEditor:
     def extract_data(self):
         """Extract all data from parser"""
         # Extract all Cartesian coordinate points
-        self.points = []
-        self.point_indices = []
-        self.colors = []
-
-        for i, cmd in enumerate(self.parser.motion_commands):
-            if cmd.position:
-                self.points.append([cmd.position.x, cmd.position.y, cmd.position.z])
-                self.point_indices.append(i)
-                # Color based on velocity
-                if cmd.velocity and cmd.velocity < 0.05:
-                    self.colors.append('red')
-                else:
-                    self.colors.append('green')
-
-        self.points = np.array(self.points) if self.points else np.array([])
+        self._rebuild_arrays()
 
         # Detect operations
         if self.parser and self.parser.motion_commands:
             print("\n=== Detecting Operations ===")
             detector = OperationDetector(self.parser.motion_commands)
-            self.drilling_operations, self.contouring_operations = detector.detect_all_operations()
+            self._set_operations(*detector.detect_all_operations())
+
+    def _rebuild_arrays(self):
+        """Rebuild cached point/color arrays from parser / 从解析器重建缓存的点和颜色数组"""
+        commands = self.parser.motion_commands
+        # _pts与motion_commands按索引对齐，无笛卡尔坐标的指令为NaN
+        self._pts = motion_positions(commands)
+        n = len(commands)
+        self._vel = np.fromiter((v if (v := cmd.velocity) else np.nan for cmd in commands),
+                                dtype=float, count=n)
+        self._has_aux = np.fromiter((cmd.auxiliary_point is not None for cmd in commands),
+                                    dtype=bool, count=n)
+        self._update_derived_arrays()
+
+    def _drop_rows(self, keep):
+        """Drop cached rows for deleted commands / 删除指令后同步裁剪缓存数组
+        keep: boolean mask over the commands before deletion
+        """
+        if self._dirty:
+            # 缓存已过期（keep对应的是删除前的指令），无法裁剪，下次重建
+            return
+        self._pts = self._pts[keep]
+        self._vel = self._vel[keep]
+        self._has_aux = self._has_aux[keep]
+        self._update_derived_arrays()
+
+    def _update_derived_arrays(self):
+        """Derive points/colors/ranges from _pts and _vel / 由_pts和_vel派生显示用数组"""
+        self._aux_indices = np.flatnonzero(self._has_aux).tolist()
+        has_pos = ~np.isnan(self._pts[:, 0])
+        self.point_indices = np.flatnonzero(has_pos)
+        self.points = self._pts[has_pos]
+        if len(self.points):
+            self._pts_min = self.points.min(axis=0)
+            self._pts_max = self.points.max(axis=0)
+        # Color based on velocity / 根据速度着色（直接生成RGBA数组，省去逐个解析颜色名）
+        # 移动/缩放/镜像不改变速度，颜色数组保持不变，散点图也就不必重设颜色
+        slow = self._vel[has_pos] < 0.05
+        if not np.array_equal(slow, self._slow):
+            self._slow = slow
+            self.colors = np.empty((len(slow), 4), dtype=np.float32)
+            self.colors[slow] = to_rgba('red')
+            self.colors[~slow] = to_rgba('green')
+        self._dirty = False
+
+    def _take_snapshot(self):
+        """Record original state for Undo / 记录撤销用的原始状态
+        Keeps the command objects plus their numeric coordinates instead of
+        deep-copying the parser; editing only changes coordinates, the
+        command list and which Position objects are attached.
+        """
+        if self._dirty:
+            self._rebuild_arrays()
+        cmds = self.parser.motion_commands
+        base = self.parser.base_frame
+        self._snapshot = {
+            'commands': list(cmds),
+            'positions': [cmd.position for cmd in cmds],
+            'pts': self._pts.copy(),
+            'vel': self._vel.copy(),
+            'has_aux': self._has_aux.copy(),
+            'aux_points': [cmd.auxiliary_point for cmd in cmds],
+            # 只记录有辅助点的指令坐标（CIRC，数量很少）
+            'aux_xyz': [(cmds[i].auxiliary_point.x, cmds[i].auxiliary_point.y,
+                         cmds[i].auxiliary_point.z) for i in self._aux_indices],
+            'base_frame': base,
+            'base_xyz': (base.x, base.y, base.z) if base else None,
+            # 检测结果只取决于指令，撤销后直接复用，不必重新检测
+            'operations': (self._copy_operations(self.drilling_operations),
+                           self._copy_operations(self.contouring_operations)),
+        }
+
+    @staticmethod
+    def _copy_operations(operations):
+        """Copy operations whose center/bounds are edited in place / 复制操作（编辑会原地修改center和bounds）"""
+        return [replace(op, center=op.center.copy(), bounds=op.bounds.copy()) for op in operations]
+
+    def _set_operations(self, drilling_operations, contouring_operations):
+        """Install detected operations / 设置检测到的操作
+        Centers and bounds are packed into (K, 3)/(K, 6) arrays and each
+        op.center / op.bounds becomes a row view, so edits can update all
+        operations with one array operation. _drill_rows/_contour_rows map
+        operation name -> row, so selections index the arrays directly.
+        Contour indices are concatenated once here (_contour_idx/_contour_idx_op)
+        so redraws gather all contour vertices with one indexing operation.
+        """
+        def pack(operations):
+            centers = np.array([op.center for op in operations], dtype=float).reshape(-1, 3)
+            bounds = np.array([op.bounds for op in operations], dtype=float).reshape(-1, 6)
+            for op, center, bound in zip(operations, centers, bounds):
+                op.center = center
+                op.bounds = bound
+            return centers, bounds
+
+        self.drilling_operations = drilling_operations
+        self.contouring_operations = contouring_operations
+        self._drill_centers, self._drill_bounds = pack(drilling_operations)
+        self._contour_centers, self._contour_bounds = pack(contouring_operations)
+        self._drill_rows = {op.name: k for k, op in enumerate(drilling_operations)}
+        self._contour_rows = {op.name: k for k, op in enumerate(contouring_operations)}
+        if contouring_operations:
+            self._contour_idx = np.concatenate([op.indices for op in contouring_operations])
+            self._contour_idx_op = np.repeat(np.arange(len(contouring_operations)),
+                                             [len(op.indices) for op in contouring_operations])
+        else:
+            self._contour_idx = np.empty(0, dtype=np.intp)
+            self._contour_idx_op = np.empty(0, dtype=np.intp)
+
+    def _transform_operations_axis(self, col, func):
+        """Apply a per-axis coordinate map to operation centers and bounds / 同步变换操作的中心和包围盒"""
+        for centers, bounds in ((self._drill_centers, self._drill_bounds),
+                                (self._contour_centers, self._contour_bounds)):
+            centers[:, col] = func(centers[:, col])
+            bounds[:, 2 * col:2 * col + 2] = np.sort(func(bounds[:, 2 * col:2 * col + 2]), axis=1)
+
+    def _remap_operations(self, keep):
+        """Update operation indices after deleting commands / 删除指令后重映射操作索引
+        keep: boolean mask over the commands before deletion.
+        Operations that lost any command are dropped (and deselected).
+        """
+        remap = np.cumsum(keep) - 1
+        n = len(keep)
+
+        def survivors(operations, selected):
+            kept = []
+            for op in operations:
+                idx = op.indices[op.indices < n]
+                if keep[idx].all():
+                    op.indices = remap[idx].astype(np.int32)
+                    kept.append(op)
+                else:
+                    selected.pop(op.name, None)
+            return kept
+
+        self._set_operations(survivors(self.drilling_operations, self.selected_drilling_ops),
+                             survivors(self.contouring_operations, self.selected_contour_ops))
+
+    def _restore_snapshot(self):
+        """Restore parser to the state saved by _take_snapshot / 恢复到快照状态"""
+        snap = self._snapshot
+        for cmd, pos, xyz, aux in zip(snap['commands'], snap['positions'],
+                                      snap['pts'].tolist(), snap['aux_points']):
+            cmd.position = pos
+            cmd.auxiliary_point = aux
+            if pos:
+                pos.x, pos.y, pos.z = xyz
+        aux_rows = np.flatnonzero(snap['has_aux']).tolist()
+        for i, xyz in zip(aux_rows, snap['aux_xyz']):
+            aux = snap['aux_points'][i]
+            aux.x, aux.y, aux.z = xyz
+        self.parser.motion_commands = list(snap['commands'])
+
+        base = snap['base_frame']
+        if base:
+            base.x, base.y, base.z = snap['base_xyz']
+        self.parser.base_frame = base
+
+        drills, contours = snap['operations']
+        self._set_operations(self._copy_operations(drills), self._copy_operations(contours))
+
+        # 缓存数组直接从快照复制，不必重新遍历指令
+        self._pts = snap['pts'].copy()
+        self._vel = snap['vel'].copy()
+        self._has_aux = snap['has_aux'].copy()
+        self._update_derived_arrays()
+
+    def _sync_positions_from_array(self, rows=None, axis=None):
+        """Write _pts rows back into Position objects / 将_pts写回Position对象
+        rows: command indices to write (default: all commands with position)
+        axis: 'x'/'y'/'z' to write only that coordinate (单轴缩放/镜像)
+        """
+        commands = self.parser.motion_commands
+        if rows is None:
+            rows = np.flatnonzero(~np.isnan(self._pts[:, 0]))
+        # tolist() 转回Python float，导出格式与原来一致
+        if axis is not None:
+            for i, v in zip(rows.tolist(), self._pts[rows, _AXIS[axis]].tolist()):
+                setattr(commands[i].position, axis, v)
+            return
+        for i, (x, y, z) in zip(rows.tolist(), self._pts[rows].tolist()):
+            p = commands[i].position
+            p.x, p.y, p.z = x, y, z
 
     def create_gui(self):
         """Create graphical interface / 创建图形界面"""
         self.fig = plt.figure(figsize=(16, 10))
 
+        # 合并重绘请求：滚轮缩放、连续点击选择等在一个周期内最多重绘一次
+        self._redraw_pending = False
+        self._redraw_timer = self.fig.canvas.new_timer(interval=33)
+        self._redraw_timer.single_shot = True
+        self._redraw_timer.add_callback(self._flush_redraw)
+        # 选择切换只重绘选择相关图元，其余部分从上次完整绘制的背景恢复
+        self._blit_bg = None
+
         # 3D view (left large window) / 3D视图 (左侧大窗口)
         self.ax_3d = self.fig.add_subplot(121, projection='3d')
 
@@ -678,8 +1003,9 @@ class InteractiveKUKAEditor:
 
         # Statistics info display / 统计信息显示
         self.info_text = self.fig.text(panel_left, 0.03, '', fontsize=9,
-                                       family='monospace', verticalalignment='bottom')
-        self.update_info()
+                                       family='monospace', verticalalignment='bottom',
+                                       animated=True)
+        self._rebuild_info()
 
         # === View Control Panel / 视图控制面板 ===
         view_panel_top = 0.20
@@ -718,9 +1044,87 @@ class InteractiveKUKAEditor:
         # Connect mouse events for selection and zoom
         self.fig.canvas.mpl_connect('button_press_event', self.on_canvas_click)
         self.fig.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def request_redraw(self):
+        """Mark figure for redraw, flushed by timer / 标记需要重绘，由定时器统一刷新"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self._redraw_timer.start()
+
+    def _flush_redraw(self):
+        """Perform pending redraw / 执行挂起的重绘"""
+        if self._redraw_pending:
+            if self._window_hidden():
+                # 窗口最小化时不重绘，保持挂起，稍后再检查；恢复显示后补画一次
+                self._redraw_timer.interval = 250
+                self._redraw_timer.start()
+                return
+            self._redraw_timer.interval = 33
+            self._redraw_pending = False
+            if self._info_dirty:
+                self._rebuild_info()
+            self.fig.canvas.draw_idle()
+
+    def _selection_artists(self):
+        """Artists that change with the selection / 随选择变化的图元（均为 animated）"""
+        artists = [self._drill_scatter, self._contour_lines, self.ax_3d.legend_, self.info_text]
+        return [a for a in artists if a is not None]
+
+    def _draw_selection_artists(self):
+        """Draw the animated artists on top of the canvas / 在画布上绘制 animated 图元"""
+        for artist in self._selection_artists():
+            if hasattr(artist, 'do_3d_projection'):
+                # 颜色/大小更新后需重新投影排序；视角未变，用上次绘制的投影矩阵
+                artist.do_3d_projection()
+            self.fig.draw_artist(artist)
+
+    def _on_draw(self, event):
+        """After a full draw: save the background, then draw the animated artists
+        完整绘制后保存背景（不含 animated 图元），再把它们画上去"""
+        if self.fig.canvas.is_saving():
+            # savefig 时坐标轴内的 animated 图元已正常绘制，图级别的统计文本不会，需补画
+            self.info_text.draw(event.renderer)
+            return
+        self._blit_bg = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_selection_artists()
+
+    def _blit_selection(self):
+        """Redraw only the selection artists after a click / 点击选择后只重绘选择相关图元
+        Falls back to a normal redraw when no background is saved yet, a full
+        redraw is already pending, or the backend cannot blit.
+        """
+        canvas = self.fig.canvas
+        if self._blit_bg is None or self._redraw_pending or not canvas.supports_blit:
+            self.update_info()
+            return
+        self._rebuild_info()
+        canvas.restore_region(self._blit_bg)
+        self._draw_selection_artists()
+        canvas.blit(self.fig.bbox)
+
+    def _window_hidden(self):
+        """Whether the figure window is minimized/withdrawn / 图形窗口是否被最小化或隐藏
+        Only known for the Tk backend; other backends always count as visible.
+        """
+        window = getattr(self.fig.canvas.manager, 'window', None)
+        try:
+            return window is not None and not window.winfo_viewable()
+        except Exception:
+            return False
+
+    def update_3d_plot(self, rebuild=False):
+        """Update 3D view / 更新3D视图
+        Existing artists are updated in place after edits; the axes are only
+        cleared and rebuilt on the first draw, when a file is loaded
+        (rebuild=True), or when the set of artists changes.
+        """
+        if not rebuild and self.parser and self._path_line is not None:
+            if self._dirty:
+                self._rebuild_arrays()
+            if self._refresh_plot_data():
+                return
 
-    def update_3d_plot(self):
-        """Update 3D view / 更新3D视图"""
         # Save current view limits if user has zoomed
         saved_xlim = None
         saved_ylim = None
@@ -739,6 +1143,10 @@ class InteractiveKUKAEditor:
                 pass
 
         self.ax_3d.clear()
+        self._screen_dirty = True
+        self._path_line = None
+        self._drill_scatter = None
+        self._contour_lines = None
 
         # Check if parser exists
         if not self.parser:
@@ -752,121 +1160,233 @@ class InteractiveKUKAEditor:
             self.ax_3d.set_title('KUKA Interactive Editor - 3D Path View', fontweight='bold')
             return
 
-        # Re-extract points / 重新提取点
-        self.points = []
-        self.point_indices = []
-        self.colors = []
-
-        for i, cmd in enumerate(self.parser.motion_commands):
-            if cmd.position:
-                self.points.append([cmd.position.x, cmd.position.y, cmd.position.z])
-                self.point_indices.append(i)
-                if cmd.velocity and cmd.velocity < 0.05:
-                    self.colors.append('red')
-                else:
-                    self.colors.append('green')
+        # Re-extract points only after the parser was modified / 仅在解析器修改后重新提取点
+        if self._dirty:
+            self._rebuild_arrays()
 
-        if not self.points:
+        if len(self.points) == 0:
             self.ax_3d.text(0, 0, 0, 'No points to display', fontsize=14)  # 没有可显示的点
             return
 
-        self.points = np.array(self.points)
-
         # Draw path / 绘制路径
-        self.ax_3d.plot(self.points[:, 0], self.points[:, 1], self.points[:, 2],
-                       'gray', linewidth=0.5, alpha=0.3)
+        self._path_line, = self.ax_3d.plot(self.points[:, 0], self.points[:, 1], self.points[:, 2],
+                                           'gray', linewidth=0.5, alpha=0.3)
 
         # Draw points / 绘制点
-        self.ax_3d.scatter(self.points[:, 0], self.points[:, 1], self.points[:, 2],
-                          c=self.colors, s=20, alpha=0.6)
+        self._points_scatter = self.ax_3d.scatter(self.points[:, 0], self.points[:, 1], self.points[:, 2],
+                                                  c=self.colors, s=20, alpha=POINT_ALPHA)
+        self._points_scatter_colors = self.colors
 
         # Draw drilling operations / 绘制钻孔操作
-        first_selected = True
-        first_unselected = True
-        for drill_op in self.drilling_operations:
-            if drill_op.name in self.selected_drilling_names:
-                # Selected drilling - red triangle / 选中的钻孔 - 红色三角形
-                self.ax_3d.scatter(drill_op.center[0], drill_op.center[1], drill_op.center[2],
-                                  c='red', s=300, marker='v', edgecolors='darkred', linewidths=2,
-                                  label='Selected Drilling' if first_selected else '')
-                first_selected = False
-            else:
-                # Unselected drilling - blue triangle / 未选中的钻孔 - 蓝色三角形
-                self.ax_3d.scatter(drill_op.center[0], drill_op.center[1], drill_op.center[2],
-                                  c='dodgerblue', s=200, marker='v', edgecolors='blue', linewidths=1.5,
-                                  label='Drilling' if first_unselected else '', alpha=0.7)
-                first_unselected = False
-
-        # Draw contouring operations / 绘制轮廓加工操作
-        first_selected_contour = True
-        first_unselected_contour = True
-        for contour_op in self.contouring_operations:
-            # Get all points in this contour with bounds checking
-            contour_points = [self.parser.motion_commands[i].position for i in contour_op.indices
-                            if i < len(self.parser.motion_commands) and self.parser.motion_commands[i].position]
-
-            if contour_points:
-                xs = [p.x for p in contour_points]
-                ys = [p.y for p in contour_points]
-                zs = [p.z for p in contour_points]
-
-                if contour_op.name in self.selected_contour_names:
-                    # Selected contour - orange line / 选中的轮廓 - 橙色线
-                    self.ax_3d.plot(xs, ys, zs, color='orange', linewidth=3, alpha=0.9,
-                                   label='Selected Contour' if first_selected_contour else '')
-                    first_selected_contour = False
-                else:
-                    # Unselected contour - green line / 未选中的轮廓 - 绿色线
-                    self.ax_3d.plot(xs, ys, zs, color='limegreen', linewidth=2, alpha=0.6,
-                                   label='Contour' if first_unselected_contour else '')
-                    first_unselected_contour = False
+        # 所有钻孔共用一个散点集合，选中状态只更新颜色和大小
+        if self.drilling_operations:
+            centers = self._drill_centers
+            self._drill_scatter = self.ax_3d.scatter(centers[:, 0], centers[:, 1], centers[:, 2],
+                                                     marker='v', depthshade=False, animated=True)
+
+        # Draw contouring operations / 绘制轮廓加工操作（所有轮廓共用一个线集合）
+        segments, self._contour_line_names = self._contour_segments()
+        if segments:
+            self._contour_lines = Line3DCollection(segments, animated=True)
+            self.ax_3d.add_collection3d(self._contour_lines)
 
         # Mark start and end points / 标注起点和终点
-        self.ax_3d.scatter(self.points[0, 0], self.points[0, 1], self.points[0, 2],
-                          c='lime', s=200, marker='o', label='Start', edgecolors='black', linewidths=2)  # 起点
-        self.ax_3d.scatter(self.points[-1, 0], self.points[-1, 1], self.points[-1, 2],
-                          c='red', s=200, marker='X', label='End', edgecolors='black', linewidths=2)  # 终点
+        self._start_scatter = self.ax_3d.scatter(self.points[0, 0], self.points[0, 1], self.points[0, 2],
+                                                 c='lime', s=200, marker='o', label='Start',
+                                                 edgecolors='black', linewidths=2)  # 起点
+        self._end_scatter = self.ax_3d.scatter(self.points[-1, 0], self.points[-1, 1], self.points[-1, 2],
+                                               c='red', s=200, marker='X', label='End',
+                                               edgecolors='black', linewidths=2)  # 终点
 
         # Set labels / 设置标签
         self.ax_3d.set_xlabel('X (mm)', fontweight='bold')
         self.ax_3d.set_ylabel('Y (mm)', fontweight='bold')
         self.ax_3d.set_zlabel('Z (mm)', fontweight='bold')
         self.ax_3d.set_title(f'{self.parser.program_name} - 3D Path View', fontweight='bold')  # 3D路径视图
-        self.ax_3d.legend(loc='upper right', fontsize=8)
+        self._update_selection_artists()
         self.ax_3d.grid(True, alpha=0.3)
 
         # Set equal aspect ratio / 设置相同比例
-        if len(self.points) > 0:
-            max_range = np.array([
-                self.points[:, 0].max() - self.points[:, 0].min(),
-                self.points[:, 1].max() - self.points[:, 1].min(),
-                self.points[:, 2].max() - self.points[:, 2].min()
-            ]).max() / 2.0
+        if not self.user_has_zoomed or saved_xlim is None:
+            # Only set default view limits if user hasn't zoomed
+            self._set_default_limits()
+        else:
+            # Restore user's zoom state
+            self.ax_3d.set_xlim(saved_xlim)
+            self.ax_3d.set_ylim(saved_ylim)
+            self.ax_3d.set_zlim(saved_zlim)
+            if saved_elev is not None and saved_azim is not None:
+                self.ax_3d.view_init(elev=saved_elev, azim=saved_azim)
+
+        # 缩放（按钮、滚轮、鼠标拖动）都会改变范围，据此调整路径抽稀
+        # clear() 会清掉回调，每次重建都要重新连接
+        self._path_tol = None
+        self._update_thinned_artists()
+        self.ax_3d.callbacks.connect('xlim_changed', lambda ax: self._update_thinned_artists())
+
+        self.request_redraw()
+
+    def _contour_segments(self):
+        """Polyline vertices of each contour / 每个轮廓的折线顶点
+        Returns (segments, names); contours without coordinates are skipped.
+        """
+        # Get all contour points at once with bounds checking, then split per contour
+        idx = self._contour_idx
+        op_of = self._contour_idx_op
+        in_range = idx < len(self._pts)
+        xyz = self._pts[idx[in_range]]
+        has_pos = ~np.isnan(xyz[:, 0])
+        xyz = xyz[has_pos]
+        counts = np.bincount(op_of[in_range][has_pos], minlength=len(self.contouring_operations))
+
+        segments = []
+        names = []
+        for contour_op, contour_xyz, count in zip(self.contouring_operations,
+                                                  np.split(xyz, np.cumsum(counts)[:-1]), counts):
+            if count:
+                segments.append(contour_xyz)
+                names.append(contour_op.name)
+        return segments, names
+
+    def _set_default_limits(self):
+        """Fit equal-range view limits around all points / 按所有点设置等比例视图范围"""
+        max_range = (self._pts_max - self._pts_min).max() / 2.0
+        mid_x, mid_y, mid_z = (self._pts_max + self._pts_min) * 0.5
+
+        self.ax_3d.set_xlim(mid_x - max_range, mid_x + max_range)
+        self.ax_3d.set_ylim(mid_y - max_range, mid_y + max_range)
+        self.ax_3d.set_zlim(mid_z - max_range, mid_z + max_range)
+
+        # Save initial view limits for reset (only once)
+        if self.initial_xlim is None:
+            self.initial_xlim = (mid_x - max_range, mid_x + max_range)
+            self.initial_ylim = (mid_y - max_range, mid_y + max_range)
+            self.initial_zlim = (mid_z - max_range, mid_z + max_range)
+
+    def _refresh_plot_data(self):
+        """Update existing artists with the current data / 用当前数据原地更新图元
+        Returns False (nothing changed) if the artists cannot be reused, i.e. the
+        program became empty or drilling/contour artists appear or disappear.
+        """
+        segments, names = self._contour_segments()
+        if (not len(self.points)
+                or (self._drill_scatter is None) == bool(self.drilling_operations)
+                or (self._contour_lines is None) == bool(segments)):
+            return False
 
-            mid_x = (self.points[:, 0].max() + self.points[:, 0].min()) * 0.5
-            mid_y = (self.points[:, 1].max() + self.points[:, 1].min()) * 0.5
-            mid_z = (self.points[:, 2].max() + self.points[:, 2].min()) * 0.5
+        x, y, z = self.points.T
+        self._path_tol = None  # 路径顶点和速度散点在最后由 _update_thinned_artists 设置
+        self._start_scatter._offsets3d = (x[:1], y[:1], z[:1])
+        self._end_scatter._offsets3d = (x[-1:], y[-1:], z[-1:])
 
-            # Only set default view limits if user hasn't zoomed
-            if not self.user_has_zoomed or saved_xlim is None:
-                self.ax_3d.set_xlim(mid_x - max_range, mid_x + max_range)
-                self.ax_3d.set_ylim(mid_y - max_range, mid_y + max_range)
-                self.ax_3d.set_zlim(mid_z - max_range, mid_z + max_range)
-            else:
-                # Restore user's zoom state
-                self.ax_3d.set_xlim(saved_xlim)
-                self.ax_3d.set_ylim(saved_ylim)
-                self.ax_3d.set_zlim(saved_zlim)
-                if saved_elev is not None and saved_azim is not None:
-                    self.ax_3d.view_init(elev=saved_elev, azim=saved_azim)
-
-            # Save initial view limits for reset (only once)
-            if self.initial_xlim is None:
-                self.initial_xlim = (mid_x - max_range, mid_x + max_range)
-                self.initial_ylim = (mid_y - max_range, mid_y + max_range)
-                self.initial_zlim = (mid_z - max_range, mid_z + max_range)
+        if self._drill_scatter is not None:
+            # 复制一份，之后原地编辑centers不会悄悄改动图元
+            self._drill_scatter._offsets3d = tuple(self._drill_centers.T.copy())
 
-        self.fig.canvas.draw_idle()
+        if self._contour_lines is not None:
+            self._contour_lines.set_segments(segments)
+        self._contour_line_names = names
+
+        for artist in (self._start_scatter, self._end_scatter, self._drill_scatter):
+            if artist is not None:
+                artist.stale = True
+
+        # 数量或选择可能已变，重新设置样式和图例
+        self._update_selection_artists()
+
+        if not self.user_has_zoomed:
+            self._set_default_limits()
+        self._update_thinned_artists()
+
+        self._screen_dirty = True
+        self.request_redraw()
+        return True
+
+    def _update_thinned_artists(self):
+        """Set path line and point markers, thinned for large programs / 设置路径线和速度散点，点数很多时抽稀
+        The tolerance is ~1/1000 of the view span, so it is recomputed after data
+        changes and when zooming changes the span by more than 2x. Point markers
+        of the same color within one tol-sized cell are drawn once, with the
+        opacity their stacked copies would have had.
+        """
+        if self._path_line is None:
+            return
+        tol = 0.0
+        if len(self.points) > PATH_THIN_MIN_POINTS:
+            x0, x1 = self.ax_3d.get_xlim()
+            tol = abs(x1 - x0) / 1000.0
+        if self._path_tol is not None and self._path_tol / 2 <= tol <= self._path_tol * 2:
+            return
+
+        points = self.points[thin_polyline(self.points, tol)] if tol > 0 else self.points
+        self._path_line.set_data_3d(*points.T)
+        self._path_tol = tol
+
+        merged = merge_markers(self.points, self._slow.astype(np.int64), tol) if tol > 0 else None
+        scatter = self._points_scatter
+        if merged is None:
+            scatter._offsets3d = tuple(self.points.T)
+            if self._points_scatter_colors is not self.colors:  # 删除/撤销后点数和颜色会变
+                scatter.set_alpha(POINT_ALPHA)
+                scatter.set_facecolor(self.colors)
+                self._points_scatter_colors = self.colors
+        else:
+            rows, counts = merged
+            colors = self.colors[rows]
+            # k 个重叠的半透明点叠加后的不透明度
+            colors[:, 3] = 1.0 - (1.0 - POINT_ALPHA) ** counts
+            scatter._offsets3d = tuple(self.points[rows].T)
+            scatter.set_alpha(None)
+            scatter.set_facecolor(colors)
+            self._points_scatter_colors = None
+        scatter.stale = True
+
+    def _update_selection_artists(self):
+        """Restyle drilling/contour artists for current selection / 按当前选择更新钻孔和轮廓样式"""
+        # (label, legend handle) in order of first appearance, like per-operation artists had
+        entries = {}
+
+        if self._drill_scatter is not None:
+            sel = np.zeros(len(self.drilling_operations), dtype=bool)
+            sel[[self._drill_rows[name] for name in self.selected_drilling_ops]] = True
+            # Selected: red triangle / 选中 - 红色三角形; unselected: blue triangle / 未选中 - 蓝色三角形
+            self._drill_scatter.set_facecolors(np.where(sel[:, None], to_rgba('red'),
+                                                        to_rgba('dodgerblue', 0.7)))
+            self._drill_scatter.set_edgecolors(np.where(sel[:, None], to_rgba('darkred'),
+                                                        to_rgba('blue', 0.7)))
+            self._drill_scatter.set_sizes(np.where(sel, 300, 200))
+            self._drill_scatter.set_linewidths(np.where(sel, 2.0, 1.5))
+            for is_sel in sel:
+                label = 'Selected Drilling' if is_sel else 'Drilling'
+                if label not in entries:
+                    entries[label] = Line2D([], [], linestyle='none', marker='v',
+                                            markersize=np.sqrt(300 if is_sel else 200),
+                                            markerfacecolor='red' if is_sel else 'dodgerblue',
+                                            markeredgecolor='darkred' if is_sel else 'blue',
+                                            markeredgewidth=2 if is_sel else 1.5,
+                                            alpha=1.0 if is_sel else 0.7)
+
+        if self._contour_lines is not None:
+            sel = np.array([name in self.selected_contour_ops for name in self._contour_line_names])
+            # Selected: orange / 选中 - 橙色线; unselected: green / 未选中 - 绿色线
+            self._contour_lines.set_colors(np.where(sel[:, None], to_rgba('orange', 0.9),
+                                                    to_rgba('limegreen', 0.6)))
+            self._contour_lines.set_linewidths(np.where(sel, 3.0, 2.0))
+            for is_sel in sel:
+                label = 'Selected Contour' if is_sel else 'Contour'
+                if label not in entries:
+                    entries[label] = Line2D([], [], color='orange' if is_sel else 'limegreen',
+                                            linewidth=3 if is_sel else 2, alpha=0.9 if is_sel else 0.6)
+
+        # 起点/终点散点自带标签
+        handles = list(entries.values())
+        labels = list(entries.keys())
+        for artist in self.ax_3d.collections:
+            label = artist.get_label()
+            if label in ('Start', 'End'):
+                handles.append(artist)
+                labels.append(label)
+        self.ax_3d.legend(handles, labels, loc='upper right', fontsize=8).set_animated(True)
 
     def on_canvas_click(self, event):
         """Handle mouse click on 3D canvas / 处理3D画布上的鼠标点击"""
@@ -881,149 +1401,219 @@ class InteractiveKUKAEditor:
         if event.x is None or event.y is None:
             return
 
-        from mpl_toolkits.mplot3d import proj3d
-
-        # Find nearest drilling operation based on screen distance
-        min_drill_distance = float('inf')
-        selected_drill = None
-
-        for drill_op in self.drilling_operations:
-            # Project 3D point to 2D screen space
-            try:
-                x2d, y2d, _ = proj3d.proj_transform(drill_op.center[0],
-                                                     drill_op.center[1],
-                                                     drill_op.center[2],
-                                                     self.ax_3d.get_proj())
-                x_disp, y_disp = self.ax_3d.transData.transform((x2d, y2d))
-                distance = np.sqrt((event.x - x_disp)**2 + (event.y - y_disp)**2)
-
-                if distance < min_drill_distance:
-                    min_drill_distance = distance
-                    selected_drill = drill_op
-
-            except Exception:
-                continue
-
-        # Find nearest contour operation based on screen distance to contour path
-        min_contour_distance = float('inf')
-        selected_contour = None
-
-        for contour_op in self.contouring_operations:
-            try:
-                # Check distance to contour center point
-                x2d, y2d, _ = proj3d.proj_transform(contour_op.center[0],
-                                                     contour_op.center[1],
-                                                     contour_op.center[2],
-                                                     self.ax_3d.get_proj())
-                x_disp, y_disp = self.ax_3d.transData.transform((x2d, y2d))
-                distance_to_center = np.sqrt((event.x - x_disp)**2 + (event.y - y_disp)**2)
-
-                # Also check distance to contour path points
-                min_path_distance = distance_to_center
-                for idx in contour_op.indices[:10]:  # Sample first 10 points for performance
-                    if idx >= len(self.parser.motion_commands):
-                        continue
-                    cmd = self.parser.motion_commands[idx]
-                    if cmd.position:
-                        x2d, y2d, _ = proj3d.proj_transform(cmd.position.x,
-                                                             cmd.position.y,
-                                                             cmd.position.z,
-                                                             self.ax_3d.get_proj())
-                        x_disp, y_disp = self.ax_3d.transData.transform((x2d, y2d))
-                        dist = np.sqrt((event.x - x_disp)**2 + (event.y - y_disp)**2)
-                        min_path_distance = min(min_path_distance, dist)
-
-                if min_path_distance < min_contour_distance:
-                    min_contour_distance = min_path_distance
-                    selected_contour = contour_op
-
-            except Exception:
-                continue
-
         # Determine which object to select (drilling or contour)
         # Priority: prefer the closest one, but drilling has slight preference if very close
         threshold_drill = 50  # pixels
         threshold_contour = 60  # pixels - slightly larger for contours
 
+        drill_xy, contour_xy, contour_owner = self._get_screen_points()
+        click = np.array([event.x, event.y])
+
+        # Find nearest drilling operation based on screen distance
+        min_drill_distance, k = self._nearest_screen_point(drill_xy, click, threshold_drill)
+        selected_drill = self.drilling_operations[k] if k is not None else None
+
+        # Find nearest contour operation (center + first 10 path points)
+        min_contour_distance, k = self._nearest_screen_point(contour_xy, click, threshold_contour)
+        selected_contour = self.contouring_operations[contour_owner[k]] if k is not None else None
+
         if min_drill_distance < threshold_drill and min_drill_distance < min_contour_distance:
             # Select drilling
-            if selected_drill.name in self.selected_drilling_names:
-                self.selected_drilling_names.remove(selected_drill.name)
+            if selected_drill.name in self.selected_drilling_ops:
+                del self.selected_drilling_ops[selected_drill.name]
             else:
-                self.selected_drilling_names.add(selected_drill.name)
+                self.selected_drilling_ops[selected_drill.name] = selected_drill
 
-            # Update visualization
-            self.update_3d_plot()
-            self.update_info()
+            # Update visualization (数据未变，只更新样式)
+            self._update_selection_artists()
+            self._blit_selection()
 
         elif min_contour_distance < threshold_contour:
             # Select contour
-            if selected_contour.name in self.selected_contour_names:
-                self.selected_contour_names.remove(selected_contour.name)
+            if selected_contour.name in self.selected_contour_ops:
+                del self.selected_contour_ops[selected_contour.name]
             else:
-                self.selected_contour_names.add(selected_contour.name)
-
-            # Update visualization
-            self.update_3d_plot()
-            self.update_info()
+                self.selected_contour_ops[selected_contour.name] = selected_contour
+
+            # Update visualization (数据未变，只更新样式)
+            self._update_selection_artists()
+            self._blit_selection()
+
+    def _project_batch(self, xyz, M=None):
+        """Project (K, 3) world points to display pixels / 批量投影到屏幕坐标"""
+        if M is None:
+            M = self.ax_3d.get_proj()
+        if len(xyz) == 0:
+            return np.empty((0, 2))
+        # 齐次坐标一次矩阵乘法，等价于逐点调用 proj3d.proj_transform
+        P = np.column_stack([xyz, np.ones(len(xyz))]) @ M.T
+        return self.ax_3d.transData.transform(P[:, :2] / P[:, 3:4])
+
+    @staticmethod
+    def _nearest_screen_point(xy, click, threshold):
+        """Nearest row of xy to click within threshold pixels / 查找阈值内离点击最近的点
+        Returns (distance, row), or (inf, None) if nothing is close enough.
+        Points outside the threshold box around the click are skipped first.
+        """
+        d = np.abs(xy - click)
+        cand = np.flatnonzero((d[:, 0] < threshold) & (d[:, 1] < threshold))
+        if len(cand) == 0:
+            return float('inf'), None
+        dist = np.hypot(d[cand, 0], d[cand, 1])
+        k = int(np.argmin(dist))
+        return dist[k], int(cand[k])
+
+    def _get_screen_points(self):
+        """Screen positions of clickable objects / 可点击对象的屏幕坐标
+
+        Returns (drill_xy, contour_xy, contour_owner); contour_owner[k] is the
+        contour index of row k. 世界坐标只在数据变化后收集，视角变化后只重新投影
+        """
+        if self._screen_dirty or self._screen_world is None:
+            if self.parser and self._dirty:
+                self._rebuild_arrays()
+
+            # 每个轮廓取中心点和前10个路径点
+            contour_pts = []
+            contour_owner = []
+            for ci, contour_op in enumerate(self.contouring_operations):
+                idx = contour_op.indices[:10]
+                sample = self._pts[idx[idx < len(self._pts)]]
+                sample = sample[~np.isnan(sample[:, 0])]
+                contour_pts.append(self._contour_centers[ci:ci + 1])
+                contour_pts.append(sample)
+                contour_owner.append(np.full(len(sample) + 1, ci))
+            contour_pts = np.concatenate(contour_pts) if contour_pts else np.empty((0, 3))
+            contour_owner = np.concatenate(contour_owner) if contour_owner else np.empty(0, dtype=int)
+
+            # 复制centers，之后原地移动操作时缓存不会被悄悄改动（由_screen_dirty统一失效）
+            self._screen_world = (self._drill_centers.copy(), contour_pts, contour_owner)
+            self._screen_xy = None
+            self._screen_dirty = False
+
+        M = self.ax_3d.get_proj()
+        key = (M.tobytes(), self.ax_3d.transData.get_affine().get_matrix().tobytes())
+        if self._screen_xy is None or key != self._screen_key:
+            drill_pts, contour_pts, contour_owner = self._screen_world
+            self._screen_xy = (self._project_batch(drill_pts, M),
+                               self._project_batch(contour_pts, M),
+                               contour_owner)
+            self._screen_key = key
+        return self._screen_xy
 
     def update_info(self):
-        """Update statistics info / 更新统计信息"""
+        """Update statistics info / 更新统计信息
+        Only marks the panel stale; the text is rebuilt once in _flush_redraw,
+        so several edits within one frame format it only once.
+        """
+        self._info_dirty = True
+        self.request_redraw()
+
+    def _rebuild_info(self):
+        """Format the statistics panel text / 生成统计信息面板文本"""
+        self._info_dirty = False
         if not self.parser:
             info = """No file loaded
 
 Click 'Open' button to
 load a KUKA .src file"""
             self.info_text.set_text(info)
-            self.fig.canvas.draw_idle()
             return
 
+        if self._dirty:
+            self._rebuild_arrays()
+
         total = len(self.parser.motion_commands)
-        cartesian = len([c for c in self.parser.motion_commands if c.position])
+        cartesian = len(self.points)
 
         if cartesian > 0:
-            x_coords = [c.position.x for c in self.parser.motion_commands if c.position]
-            y_coords = [c.position.y for c in self.parser.motion_commands if c.position]
-            z_coords = [c.position.z for c in self.parser.motion_commands if c.position]
-
+            # XYZ范围在重建数组时已算好
+            mn, mx = self._pts_min, self._pts_max
             info = f"""Statistics:
 Total Commands: {total}
 Cartesian Points: {cartesian}
 
 Workspace:
-X: [{min(x_coords):.1f}, {max(x_coords):.1f}] mm
-Y: [{min(y_coords):.1f}, {max(y_coords):.1f}] mm
-Z: [{min(z_coords):.1f}, {max(z_coords):.1f}] mm
+X: [{mn[0]:.1f}, {mx[0]:.1f}] mm
+Y: [{mn[1]:.1f}, {mx[1]:.1f}] mm
+Z: [{mn[2]:.1f}, {mx[2]:.1f}] mm
 
 Operations:
-Drilling: {len(self.drilling_operations)} ({len(self.selected_drilling_names)} selected)
-Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)} selected)"""
+Drilling: {len(self.drilling_operations)} ({len(self.selected_drilling_ops)} selected)
+Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_ops)} selected)"""
         else:
             info = f"Total Commands: {total}\nCartesian Points: 0"  # 总指令/笛卡尔点
 
         self.info_text.set_text(info)
-        self.fig.canvas.draw_idle()
+
+    def _reset_textboxes(self, *boxes):
+        """Reset offset textboxes to '0' / 将偏移输入框重置为0
+        TextBox.set_val() fires the change/submit callbacks and forces a full
+        synchronous canvas.draw() per box; set the text directly and let the
+        coalesced redraw pick it up.
+        """
+        for box in boxes:
+            box.text_disp.set_text('0')
+        self.request_redraw()
+
+    @staticmethod
+    def _read_offset(box_x, box_y, box_z):
+        """Parse ΔX/ΔY/ΔZ textboxes / 读取偏移量输入框（无效输入抛出ValueError）"""
+        return _parse_offset(box_x.text, box_y.text, box_z.text)
 
     def apply_offset(self, event):
         """Apply coordinate offset / 应用坐标偏移"""
         try:
-            dx = float(self.textbox_dx.text)
-            dy = float(self.textbox_dy.text)
-            dz = float(self.textbox_dz.text)
+            dx, dy, dz = self._read_offset(self.textbox_dx, self.textbox_dy, self.textbox_dz)
+            if dx == dy == dz == 0:
+                print("✗ Offset is zero, nothing to move")  # 偏移量为零
+                return
 
-            self.parser.offset_all_points(dx, dy, dz)
+            self._offset_all(dx, dy, dz)
             self.update_3d_plot()
             self.update_info()
 
             # Reset input boxes / 重置输入框
-            self.textbox_dx.set_val('0')
-            self.textbox_dy.set_val('0')
-            self.textbox_dz.set_val('0')
+            self._reset_textboxes(self.textbox_dx, self.textbox_dy, self.textbox_dz)
 
             print(f"✓ Offset applied: ΔX={dx}, ΔY={dy}, ΔZ={dz}")  # 已应用偏移
         except ValueError:
             print("✗ Please enter valid numbers")  # 请输入有效的数值
 
+    def _offset_all(self, dx, dy, dz):
+        """Translate the whole program in place / 整体平移所有坐标
+        Same result as parser.offset_all_points, but done on the cached array
+        so operation centers move too and nothing has to be re-read.
+        """
+        if self._dirty:
+            self._rebuild_arrays()
+
+        delta = np.array([dx, dy, dz])
+        self._pts += delta  # 无坐标的行为NaN，平移后仍为NaN
+        self._sync_positions_from_array()
+
+        # 辅助点（CIRC）数量很少，逐个处理
+        commands = self.parser.motion_commands
+        for i in self._aux_indices:
+            aux = commands[i].auxiliary_point
+            aux.x += dx
+            aux.y += dy
+            aux.z += dz
+
+        # 同时偏移BASE坐标系
+        base = self.parser.base_frame
+        if base:
+            base.x += dx
+            base.y += dy
+            base.z += dz
+
+        for centers, bounds in ((self._drill_centers, self._drill_bounds),
+                                (self._contour_centers, self._contour_bounds)):
+            centers += delta
+            bounds += np.repeat(delta, 2)
+
+        self._update_derived_arrays()
+
     def apply_scale(self, event):
         """Apply spacing scale / 应用间距缩放"""
         try:
@@ -1045,70 +1635,66 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
     def scale_axis(self, axis, factor):
         """Scale specified axis / 缩放指定轴"""
-        coords = []
-        for cmd in self.parser.motion_commands:
-            if cmd.position:
-                if axis == 'x':
-                    coords.append(cmd.position.x)
-                elif axis == 'y':
-                    coords.append(cmd.position.y)
-                else:
-                    coords.append(cmd.position.z)
+        if self._dirty:
+            self._rebuild_arrays()
 
-        if not coords:
+        col = _AXIS[axis]
+        rows = np.flatnonzero(~np.isnan(self._pts[:, 0]))
+        if len(rows) == 0:
             return
 
-        center = sum(coords) / len(coords)
+        # 整列一次缩放，再写回Position对象
+        values = self._pts[rows, col]
+        center = float(values.mean())
+        self._pts[rows, col] = center + (values - center) * factor
+        self._sync_positions_from_array(rows, axis)
 
-        for cmd in self.parser.motion_commands:
-            if cmd.position:
-                if axis == 'x':
-                    cmd.position.x = center + (cmd.position.x - center) * factor
-                elif axis == 'y':
-                    cmd.position.y = center + (cmd.position.y - center) * factor
-                else:
-                    cmd.position.z = center + (cmd.position.z - center) * factor
+        # 辅助点（CIRC）数量很少，逐个处理
+        commands = self.parser.motion_commands
+        for i in self._aux_indices:
+            aux = commands[i].auxiliary_point
+            setattr(aux, axis, center + (getattr(aux, axis) - center) * factor)
 
-            if cmd.auxiliary_point:
-                if axis == 'x':
-                    cmd.auxiliary_point.x = center + (cmd.auxiliary_point.x - center) * factor
-                elif axis == 'y':
-                    cmd.auxiliary_point.y = center + (cmd.auxiliary_point.y - center) * factor
-                else:
-                    cmd.auxiliary_point.z = center + (cmd.auxiliary_point.z - center) * factor
+        self._transform_operations_axis(col, lambda v: center + (v - center) * factor)
+
+        # 缓存数组已同步修改，只需刷新派生量
+        self._update_derived_arrays()
 
     def apply_mirror(self, axis):
         """Apply mirror flip / 应用镜像翻转"""
-        for cmd in self.parser.motion_commands:
-            if cmd.position:
-                if axis == 'x':
-                    cmd.position.x = -cmd.position.x
-                elif axis == 'y':
-                    cmd.position.y = -cmd.position.y
-                else:
-                    cmd.position.z = -cmd.position.z
+        if self._dirty:
+            self._rebuild_arrays()
 
-            if cmd.auxiliary_point:
-                if axis == 'x':
-                    cmd.auxiliary_point.x = -cmd.auxiliary_point.x
-                elif axis == 'y':
-                    cmd.auxiliary_point.y = -cmd.auxiliary_point.y
-                else:
-                    cmd.auxiliary_point.z = -cmd.auxiliary_point.z
+        # 整列取反（无坐标的行为NaN，取反后仍为NaN），再写回Position对象
+        col = _AXIS[axis]
+        self._pts[:, col] *= -1.0
+        self._sync_positions_from_array(axis=axis)
+
+        # 辅助点（CIRC）数量很少，逐个处理
+        commands = self.parser.motion_commands
+        for i in self._aux_indices:
+            aux = commands[i].auxiliary_point
+            setattr(aux, axis, -getattr(aux, axis))
 
         # Mirror BASE / 镜像BASE
-        if self.parser.base_frame:
-            if axis == 'x':
-                self.parser.base_frame.x = -self.parser.base_frame.x
-            elif axis == 'y':
-                self.parser.base_frame.y = -self.parser.base_frame.y
-            else:
-                self.parser.base_frame.z = -self.parser.base_frame.z
+        base = self.parser.base_frame
+        if base:
+            setattr(base, axis, -getattr(base, axis))
 
+        self._transform_operations_axis(col, lambda v: -v)
+
+        self._update_derived_arrays()
         self.update_3d_plot()
         self.update_info()
         print(f"✓ Mirrored along {axis.upper()}-axis")  # 已沿X/Y/Z轴镜像
 
+    def _delete_commands(self, keep):
+        """Drop commands where keep is False / 删除keep为False的指令，并同步缓存数组和操作索引"""
+        # compress在C层按掩码筛选，比逐条判断的列表推导快
+        self.parser.motion_commands = list(compress(self.parser.motion_commands, keep.tolist()))
+        self._drop_rows(keep)
+        self._remap_operations(keep)
+
     def delete_range(self, event):
         """Delete specified range / 删除指定范围"""
         try:
@@ -1117,7 +1703,9 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
             if 0 <= start < end <= len(self.parser.motion_commands):
                 deleted = end - start
-                del self.parser.motion_commands[start:end]
+                keep = np.ones(len(self.parser.motion_commands), dtype=bool)
+                keep[start:end] = False
+                self._delete_commands(keep)
                 self.update_3d_plot()
                 self.update_info()
                 print(f"✓ Deleted points {start+1} to {end}, total {deleted} points")  # 已删除点
@@ -1132,62 +1720,43 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
         original_count = len(self.parser.motion_commands)
 
         try:
-            if condition.startswith('x>'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.x > threshold)
-                ]
-            elif condition.startswith('x<'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.x < threshold)
-                ]
-            elif condition.startswith('y>'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.y > threshold)
-                ]
-            elif condition.startswith('y<'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.y < threshold)
-                ]
-            elif condition.startswith('z>'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.z > threshold)
-                ]
-            elif condition.startswith('z<'):
-                threshold = float(condition[2:])
-                self.parser.motion_commands = [
-                    cmd for cmd in self.parser.motion_commands
-                    if not (cmd.position and cmd.position.z < threshold)
-                ]
-            else:
-                print(f"✗ Unsupported condition: {condition}")  # 不支持的条件
-                return
+            # 条件格式: x>值, y<=值, ...；多个条件用逗号分隔，同时满足才删除
+            tests = []
+            for part in condition.split(','):
+                m = _CONDITION.fullmatch(part.strip())
+                if m is None:
+                    print(f"✗ Unsupported condition: {condition}")  # 不支持的条件
+                    return
+                tests.append((_AXIS[m[1]], _COMPARE[m[2]], float(m[3])))
+
+            if self._dirty:
+                self._rebuild_arrays()
+
+            # 一次比较整列得到删除掩码；无坐标的行为NaN，比较结果为False，保留
+            hit = np.ones(len(self._pts), dtype=bool)
+            for col, compare, threshold in tests:
+                hit &= compare(self._pts[:, col], threshold)
+            if hit.any():
+                self._delete_commands(~hit)
+                self.update_3d_plot()
+                self.update_info()
 
             deleted = original_count - len(self.parser.motion_commands)
-            self.update_3d_plot()
-            self.update_info()
             print(f"✓ Deleted {deleted} points by condition '{condition}'")  # 根据条件删除了点
         except ValueError:
             print(f"✗ Invalid condition format: {condition}")  # 条件格式错误
 
     def undo(self, event):
         """Undo all changes / 撤销所有修改"""
-        self.parser = copy.deepcopy(self.original_parser)
+        if self._snapshot is None:
+            print("✗ No file loaded")
+            return
 
-        # Re-detect operations after undo
-        self.selected_drilling_names.clear()
-        self.selected_contour_names.clear()
-        detector = OperationDetector(self.parser.motion_commands)
-        self.drilling_operations, self.contouring_operations = detector.detect_all_operations()
+        self._restore_snapshot()
+
+        # 操作检测结果已随快照恢复
+        self.selected_drilling_ops.clear()
+        self.selected_contour_ops.clear()
 
         # Reset zoom state
         self.user_has_zoomed = False
@@ -1201,122 +1770,114 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
     def delete_selected_drilling(self, event):
         """Delete selected drilling operations / 删除选中的钻孔操作"""
-        if not self.selected_drilling_names:
+        if not self.selected_drilling_ops:
             print("✗ No drilling operations selected")  # 未选中钻孔操作
             return
 
         # Collect all indices to delete
         # 注意：大孔的indices已经在_convert_large_holes_to_drilling()中包含了前面的过渡指令
-        indices_to_delete = set()
-        for drill_op in self.drilling_operations:
-            if drill_op.name in self.selected_drilling_names:
-                indices_to_delete.update(drill_op.indices)
+        original_count = len(self.parser.motion_commands)
+        keep = np.ones(original_count, dtype=bool)
+        for drill_op in self.selected_drilling_ops.values():
+            idx = drill_op.indices
+            keep[idx[idx < original_count]] = False
 
         # Keep only commands that are NOT in the delete list
-        original_count = len(self.parser.motion_commands)
-        self.parser.motion_commands = [
-            cmd for i, cmd in enumerate(self.parser.motion_commands)
-            if i not in indices_to_delete
-        ]
+        # 其余操作的指令未变，只需重映射索引（选中的钻孔随之移除）
+        self._delete_commands(keep)
         deleted_count = original_count - len(self.parser.motion_commands)
 
-        # Clear selection and re-detect operations
-        self.selected_drilling_names.clear()
-        detector = OperationDetector(self.parser.motion_commands)
-        self.drilling_operations, self.contouring_operations = detector.detect_all_operations()
-
         # Update display
         self.update_3d_plot()
         self.update_info()
         print(f"✓ Deleted {deleted_count} commands from selected drilling operations")
 
+    def _move_operations(self, rows, centers, bounds, selected, dx, dy, dz):
+        """Translate all commands of the selected operations / 平移选中操作的所有指令
+        rows/centers/bounds: name -> row map and packed arrays (see _set_operations)
+        """
+        if not selected:
+            return
+        if self._dirty:
+            self._rebuild_arrays()
+
+        delta = np.array([dx, dy, dz])
+        idx = np.concatenate([op.indices for op in selected.values()])
+        idx = idx[idx < len(self._pts)]
+
+        # add.at: 同一指令属于多个选中操作时逐次累加，与逐个移动的结果一致
+        np.add.at(self._pts, idx, delta)
+        self._sync_positions_from_array(np.unique(idx[~np.isnan(self._pts[idx, 0])]))
+
+        # 辅助点（CIRC）数量很少，逐个处理
+        cmds = self.parser.motion_commands
+        for i in idx[self._has_aux[idx]].tolist():
+            aux = cmds[i].auxiliary_point
+            aux.x += dx
+            aux.y += dy
+            aux.z += dz
+
+        # Update operation centers (op.center/op.bounds are views of these rows)
+        sel = [rows[name] for name in selected]
+        centers[sel] += delta
+        bounds[sel] += np.repeat(delta, 2)
+
+        self._update_derived_arrays()
+
     def move_selected_drilling(self, event):
         """Move selected drilling operations / 移动选中的钻孔操作"""
-        if not self.selected_drilling_names:
+        if not self.selected_drilling_ops:
             print("✗ No drilling operations selected")  # 未选中钻孔操作
             return
 
         try:
-            dx = float(self.textbox_drill_dx.text)
-            dy = float(self.textbox_drill_dy.text)
-            dz = float(self.textbox_drill_dz.text)
+            dx, dy, dz = self._read_offset(self.textbox_drill_dx, self.textbox_drill_dy,
+                                           self.textbox_drill_dz)
+            if dx == dy == dz == 0:
+                print("✗ Offset is zero, nothing to move")  # 偏移量为零
+                return
 
             # Move all points in selected drilling operations
-            for drill_op in self.drilling_operations:
-                if drill_op.name in self.selected_drilling_names:
-                    for idx in drill_op.indices:
-                        if idx >= len(self.parser.motion_commands):
-                            continue
-                        cmd = self.parser.motion_commands[idx]
-                        if cmd.position:
-                            cmd.position.x += dx
-                            cmd.position.y += dy
-                            cmd.position.z += dz
-                        if cmd.auxiliary_point:
-                            cmd.auxiliary_point.x += dx
-                            cmd.auxiliary_point.y += dy
-                            cmd.auxiliary_point.z += dz
-
-                    # Update operation center
-                    drill_op.center[0] += dx
-                    drill_op.center[1] += dy
-                    drill_op.center[2] += dz
+            self._move_operations(self._drill_rows, self._drill_centers, self._drill_bounds,
+                                  self.selected_drilling_ops, dx, dy, dz)
 
             # Update display
             self.update_3d_plot()
             self.update_info()
 
             # Reset input boxes
-            self.textbox_drill_dx.set_val('0')
-            self.textbox_drill_dy.set_val('0')
-            self.textbox_drill_dz.set_val('0')
+            self._reset_textboxes(self.textbox_drill_dx, self.textbox_drill_dy, self.textbox_drill_dz)
 
-            print(f"✓ Moved {len(self.selected_drilling_names)} drilling operation(s): ΔX={dx}, ΔY={dy}, ΔZ={dz}")
+            print(f"✓ Moved {len(self.selected_drilling_ops)} drilling operation(s): ΔX={dx}, ΔY={dy}, ΔZ={dz}")
         except ValueError:
             print("✗ Please enter valid numbers")  # 请输入有效的数值
 
     def move_entire_contour(self, event):
         """Move selected contour operations / 移动选中的轮廓操作"""
-        if not self.selected_contour_names:
+        if not self.selected_contour_ops:
             print("✗ No contour operations selected")  # 未选中轮廓操作
             return
 
         try:
-            dx = float(self.textbox_contour_dx.text)
-            dy = float(self.textbox_contour_dy.text)
-            dz = float(self.textbox_contour_dz.text)
+            dx, dy, dz = self._read_offset(self.textbox_contour_dx, self.textbox_contour_dy,
+                                           self.textbox_contour_dz)
+            if dx == dy == dz == 0:
+                print("✗ Offset is zero, nothing to move")  # 偏移量为零
+                return
 
             # Move only selected contour operations
-            for contour_op in self.contouring_operations:
-                if contour_op.name in self.selected_contour_names:
-                    for idx in contour_op.indices:
-                        if idx >= len(self.parser.motion_commands):
-                            continue
-                        cmd = self.parser.motion_commands[idx]
-                        if cmd.position:
-                            cmd.position.x += dx
-                            cmd.position.y += dy
-                            cmd.position.z += dz
-                        if cmd.auxiliary_point:
-                            cmd.auxiliary_point.x += dx
-                            cmd.auxiliary_point.y += dy
-                            cmd.auxiliary_point.z += dz
-
-                    # Update operation center
-                    contour_op.center[0] += dx
-                    contour_op.center[1] += dy
-                    contour_op.center[2] += dz
+            self._move_operations(self._contour_rows, self._contour_centers,
+                                  self._contour_bounds, self.selected_contour_ops, dx, dy, dz)
 
             # Update display
             self.update_3d_plot()
             self.update_info()
 
             # Reset input boxes
-            self.textbox_contour_dx.set_val('0')
-            self.textbox_contour_dy.set_val('0')
-            self.textbox_contour_dz.set_val('0')
+            self._reset_textboxes(self.textbox_contour_dx, self.textbox_contour_dy,
+                                  self.textbox_contour_dz)
 
-            print(f"✓ Moved {len(self.selected_contour_names)} contour operation(s): ΔX={dx}, ΔY={dy}, ΔZ={dz}")
+            print(f"✓ Moved {len(self.selected_contour_ops)} contour operation(s): ΔX={dx}, ΔY={dy}, ΔZ={dz}")
         except ValueError:
             print("✗ Please enter valid numbers")  # 请输入有效的数值
 
@@ -1331,7 +1892,6 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
                 if file_ext in ['.nc', '.NC']:
                     # 使用NC解析器
-                    from kuka_nc_parser import KukaNCParser
                     new_parser = KukaNCParser(file_path)
                     print("  ℹ Using NC/G-code parser")
                 else:
@@ -1343,11 +1903,11 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
                 # Update current parser
                 self.parser = new_parser
-                self.original_parser = copy.deepcopy(new_parser)
+                self._dirty = True
 
                 # Clear selections
-                self.selected_drilling_names.clear()
-                self.selected_contour_names.clear()
+                self.selected_drilling_ops.clear()
+                self.selected_contour_ops.clear()
 
                 # Reset zoom state for new file
                 self.user_has_zoomed = False
@@ -1357,10 +1917,11 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
                 # Re-detect operations
                 detector = OperationDetector(self.parser.motion_commands)
-                self.drilling_operations, self.contouring_operations = detector.detect_all_operations()
+                self._set_operations(*detector.detect_all_operations())
+                self._take_snapshot()
 
-                # Update display
-                self.update_3d_plot()
+                # Update display (新文件：清空坐标轴重建全部图元)
+                self.update_3d_plot(rebuild=True)
                 self.update_info()
 
                 print(f"✓ File loaded successfully: {file_path}")
@@ -1371,18 +1932,28 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
         elif file_path:
             print(f"✗ File not found: {file_path}")
 
+    def _dialog_root(self):
+        """Hidden Tk root shared by all file dialogs / 文件对话框共用的隐藏Tk根窗口
+        Created on first use and kept, so later dialogs skip Tk startup.
+        """
+        if self._tk_root is None:
+            self._tk_root = tk.Tk()
+            self._tk_root.withdraw()  # Hide the main window
+            self._tk_root.attributes('-topmost', True)  # Make dialog appear on top
+        self._tk_root.update()
+        return self._tk_root
+
     def open_file(self, event):
         """Open file dialog to select a file / 打开文件对话框选择文件"""
         file_path = None
 
         if HAS_TKINTER:
             # Use tkinter file dialog (cross-platform GUI)
-            root = tk.Tk()
-            root.withdraw()  # Hide the main window
-            root.attributes('-topmost', True)  # Make dialog appear on top
+            root = self._dialog_root()
 
             # Open file dialog - 支持多种文件类型
             file_path = filedialog.askopenfilename(
+                parent=root,
                 title='Select KUKA file (.src, .nc)',
                 filetypes=[
                     ('All Supported', '*.src *.nc *.NC'),
@@ -1392,8 +1963,6 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
                 ],
                 initialdir='.'
             )
-
-            root.destroy()  # Clean up
         else:
             # Use simple text-based file picker
             file_path = simple_file_picker(title="Select KUKA file (.src, .nc, .NC)")
@@ -1416,9 +1985,7 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
         if HAS_TKINTER:
             # Use tkinter save dialog
-            root = tk.Tk()
-            root.withdraw()
-            root.attributes('-topmost', True)
+            root = self._dialog_root()
 
             # 根据原始文件类型设置保存对话框
             if is_nc_file:
@@ -1440,13 +2007,12 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
 
             # Open save dialog
             file_path = filedialog.asksaveasfilename(
+                parent=root,
                 title='Save Modified File',
                 defaultextension=default_ext,
                 filetypes=filetypes,
                 initialfile=os.path.basename(default_name)
             )
-
-            root.destroy()
         else:
             # Simple text-based save dialog
             if is_nc_file:
@@ -1525,7 +2091,7 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
         self.ax_3d.set_zlim(z_center - z_range, z_center + z_range)
 
         self.user_has_zoomed = True  # Mark that user has zoomed
-        self.fig.canvas.draw_idle()
+        self.request_redraw()
 
     def zoom_out(self, event):
         """Zoom out the 3D view / 缩小视图"""
@@ -1554,7 +2120,7 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
         self.ax_3d.set_zlim(z_center - z_range, z_center + z_range)
 
         self.user_has_zoomed = True  # Mark that user has zoomed
-        self.fig.canvas.draw_idle()
+        self.request_redraw()
 
     def reset_view(self, event):
         """Reset view to initial state / 重置视图"""
@@ -1615,7 +2181,7 @@ Contouring: {len(self.contouring_operations)} ({len(self.selected_contour_names)
         self.ax_3d.set_zlim(z_center - z_range, z_center + z_range)
 
         self.user_has_zoomed = True  # Mark that user has zoomed
-        self.fig.canvas.draw_idle()
+        self.request_redraw()
 
     def show(self):
         """Display GUI / 显示GUI"""
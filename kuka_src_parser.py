@@ -11,14 +11,35 @@ KUKA .src 文件解析和可视化工具
 
 import re
 import json
+from collections import Counter
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
 import copy
 
 
+# 预编译的正则表达式（解析时每行都会用到）
+_DEF_RE = re.compile(r'DEF\s+(\w+)\s*\(')
+_VEL_RE = re.compile(r'\$VEL\.CP\s*=\s*([\d.]+)')
+_COMMENT_RE = re.compile(r';(.+)')
+_POSITION_RE = re.compile(
+    r'X\s*([-\d.]+).*?Y\s*([-\d.]+).*?Z\s*([-\d.]+).*?'
+    r'A\s*([-\d.]+).*?B\s*([-\d.]+).*?C\s*([-\d.]+)'
+)
+_JOINT_RE = re.compile(
+    r'A1\s*([-\d.]+).*?A2\s*([-\d.]+).*?A3\s*([-\d.]+).*?'
+    r'A4\s*([-\d.]+).*?A5\s*([-\d.]+).*?A6\s*([-\d.]+)'
+)
+_BRACES_RE = re.compile(r'\{[^}]+\}')
+_STATUS_RE = re.compile(r',S\s*(\d+)')
+_TURN_RE = re.compile(r',T\s*(\d+)')
+
+
 @dataclass
 class Position:
     """位置数据结构"""
+    # 固定字段，省去每个点的 __dict__，属性读写更快、内存更小
+    __slots__ = ('x', 'y', 'z', 'a', 'b', 'c')
+
     x: float
     y: float
     z: float
@@ -109,7 +130,7 @@ class KUKASrcParser:
 
             # 解析程序名
             if line.startswith('DEF '):
-                match = re.match(r'DEF\s+(\w+)\s*\(', line)
+                match = _DEF_RE.match(line)
                 if match:
                     self.program_name = match.group(1)
 
@@ -123,11 +144,11 @@ class KUKASrcParser:
 
             # 解析速度设置
             elif '$VEL.CP=' in line:
-                vel_match = re.search(r'\$VEL\.CP\s*=\s*([\d.]+)', line)
+                vel_match = _VEL_RE.search(line)
                 if vel_match:
                     self.current_velocity = float(vel_match.group(1))
                     # 查找注释
-                    comment_match = re.search(r';(.+)', line)
+                    comment_match = _COMMENT_RE.search(line)
                     self.current_velocity_comment = comment_match.group(1).strip() if comment_match else None
 
             # 解析运动指令
@@ -141,38 +162,16 @@ class KUKASrcParser:
     def _parse_position(self, line: str) -> Optional[Position]:
         """解析笛卡尔坐标"""
         # 匹配 {X ..., Y ..., Z ..., A ..., B ..., C ...}
-        match = re.search(
-            r'X\s*([-\d.]+).*?Y\s*([-\d.]+).*?Z\s*([-\d.]+).*?'
-            r'A\s*([-\d.]+).*?B\s*([-\d.]+).*?C\s*([-\d.]+)',
-            line
-        )
+        match = _POSITION_RE.search(line)
         if match:
-            return Position(
-                float(match.group(1)),
-                float(match.group(2)),
-                float(match.group(3)),
-                float(match.group(4)),
-                float(match.group(5)),
-                float(match.group(6))
-            )
+            return Position(*map(float, match.groups()))
         return None
 
     def _parse_joint_position(self, line: str) -> Optional[JointPosition]:
         """解析关节角度"""
-        match = re.search(
-            r'A1\s*([-\d.]+).*?A2\s*([-\d.]+).*?A3\s*([-\d.]+).*?'
-            r'A4\s*([-\d.]+).*?A5\s*([-\d.]+).*?A6\s*([-\d.]+)',
-            line
-        )
+        match = _JOINT_RE.search(line)
         if match:
-            return JointPosition(
-                float(match.group(1)),
-                float(match.group(2)),
-                float(match.group(3)),
-                float(match.group(4)),
-                float(match.group(5)),
-                float(match.group(6))
-            )
+            return JointPosition(*map(float, match.groups()))
         return None
 
     def _parse_motion_command(self, line_num: int, line: str) -> Optional[MotionCommand]:
@@ -213,50 +212,55 @@ class KUKASrcParser:
         # 解析CIRC的辅助点
         if cmd_type == 'CIRC':
             # CIRC有两个点：辅助点和终点
-            parts = re.findall(r'\{[^}]+\}', line)
+            parts = _BRACES_RE.findall(line)
             if len(parts) >= 2:
                 aux_str = parts[0]
                 end_str = parts[1]
                 cmd.auxiliary_point = self._parse_position(aux_str)
                 cmd.position = self._parse_position(end_str)
 
-        # 解析S和T参数（主要用于PTP指令）
-        s_match = re.search(r',S\s*(\d+)', line)
-        if s_match:
-            cmd.status = int(s_match.group(1))
+        # 解析S和T参数（主要用于PTP指令）；先做子串判断，多数LIN指令不含S/T
+        if ',S' in line:
+            s_match = _STATUS_RE.search(line)
+            if s_match:
+                cmd.status = int(s_match.group(1))
 
-        t_match = re.search(r',T\s*(\d+)', line)
-        if t_match:
-            cmd.turn = int(t_match.group(1))
+        if ',T' in line:
+            t_match = _TURN_RE.search(line)
+            if t_match:
+                cmd.turn = int(t_match.group(1))
 
         return cmd
 
     def get_statistics(self) -> Dict:
         """获取统计信息"""
+        type_counts = Counter(c.command_type for c in self.motion_commands)
         stats = {
             'program_name': self.program_name,
             'total_commands': len(self.motion_commands),
-            'ptp_commands': sum(1 for c in self.motion_commands if c.command_type == 'PTP'),
-            'lin_commands': sum(1 for c in self.motion_commands if c.command_type == 'LIN'),
-            'circ_commands': sum(1 for c in self.motion_commands if c.command_type == 'CIRC'),
+            'ptp_commands': type_counts['PTP'],
+            'lin_commands': type_counts['LIN'],
+            'circ_commands': type_counts['CIRC'],
             'base_frame': self.base_frame.to_dict() if self.base_frame else None,
             'tool_frame': self.tool_frame.to_dict() if self.tool_frame else None,
         }
 
-        # 计算工作空间范围
-        cartesian_cmds = [c for c in self.motion_commands if c.position]
-        if cartesian_cmds:
-            x_coords = [c.position.x for c in cartesian_cmds]
-            y_coords = [c.position.y for c in cartesian_cmds]
-            z_coords = [c.position.z for c in cartesian_cmds]
+        # 计算工作空间范围（一次遍历取出三个坐标列）
+        coords = [(c.position.x, c.position.y, c.position.z)
+                  for c in self.motion_commands if c.position]
+        if coords:
+            x_coords, y_coords, z_coords = zip(*coords)
+            x_min, x_max = min(x_coords), max(x_coords)
+            y_min, y_max = min(y_coords), max(y_coords)
+            z_min, z_max = min(z_coords), max(z_coords)
 
             stats['workspace'] = {
-                'x_range': [min(x_coords), max(x_coords)],
-                'y_range': [min(y_coords), max(y_coords)],
-                'z_range': [min(z_coords), max(z_coords)],
-                'x_span': max(x_coords) - min(x_coords),
-                'y_span': max(y_coords) - min(y_coords),
-                'z_span': max(z_coords) - min(z_coords),
+                'x_range': [x_min, x_max],
+                'y_range': [y_min, y_max],
+                'z_range': [z_min, z_max],
+                'x_span': x_max - x_min,
+                'y_span': y_max - y_min,
+                'z_span': z_max - z_min,
             }
 
         # 速度统计
@@ -380,7 +384,7 @@ class KUKASrcParser:
                 if line_num < first_motion_line:
                     new_lines.append(line)
                     # 更新当前速度跟踪
-                    vel_match = re.search(r'\$VEL\.CP\s*=\s*([\d.]+)', stripped_line)
+                    vel_match = _VEL_RE.search(stripped_line)
                     if vel_match:
                         current_velocity = float(vel_match.group(1))
                 else:
@@ -403,7 +407,7 @@ class KUKASrcParser:
                     if is_before_ptp:
                         new_lines.append(line)
                         # 更新当前速度跟踪
-                        vel_match = re.search(r'\$VEL\.CP\s*=\s*([\d.]+)', stripped_line)
+                        vel_match = _VEL_RE.search(stripped_line)
                         if vel_match:
                             current_velocity = float(vel_match.group(1))
                     else:
@@ -57,11 +57,12 @@ class KUKAVisualizer:
 
         # 标注速度变化点
         if show_velocities:
-            # 找出速度变化的点
-            for i in range(1, len(velocities)):
-                if velocities[i] != velocities[i-1]:
-                    ax.scatter(points[i, 0], points[i, 1], points[i, 2],
-                             c='purple', s=100, marker='*', alpha=0.8)
+            # 找出速度变化的点，合成一个散点集合绘制（不再每个点一个图元）
+            velocities = np.array(velocities)
+            changed = np.flatnonzero(velocities[1:] != velocities[:-1]) + 1
+            if len(changed):
+                ax.scatter(points[changed, 0], points[changed, 1], points[changed, 2],
+                           c='purple', s=100, marker='*', alpha=0.8)
 
         # 标注起点和终点
         ax.scatter(points[0, 0], points[0, 1], points[0, 2],